@@ -9,7 +9,7 @@ from dataclasses import dataclass
 from typing import List
 import mongoengine as mg
 import database.models as models
-from database.config import Config
+from database.config import Config, connection_params
 
 
 @dataclass
@@ -87,13 +87,7 @@ def add_achievements_to_db() -> None:
         Добавление полного списка достижений в БД
     """
 
-    mg.connect(
-        db=Config.db_name,
-        username=Config.db_user,
-        password=Config.db_pass,
-        host=Config.db_ip,
-        alias=Config.main_db_alias
-    )
+    mg.connect(**connection_params())
 
     models.Achievement.objects().delete()
 
@@ -196,13 +190,7 @@ def update_players_trackers(users: List[PlayerInfo]) -> None:
         Обновление трекеров достижений у игроков
     """
 
-    mg.connect(
-        db=Config.db_name,
-        username=Config.db_user,
-        password=Config.db_pass,
-        host=Config.db_ip,
-        alias=Config.main_db_alias
-    )
+    mg.connect(**connection_params())
 
     players = list(models.Player.objects(gitlab_id__in=[u.gitlab_id for u in users]))
 
@@ -222,13 +210,7 @@ def update_players_results(game_name: str, results: List[PlayerResult]) -> None:
         Обновление результатов игр у игроков
     """
 
-    mg.connect(
-        db=Config.db_name,
-        username=Config.db_user,
-        password=Config.db_pass,
-        host=Config.db_ip,
-        alias=Config.main_db_alias
-    )
+    mg.connect(**connection_params())
 
     game = models.Game.objects(name=game_name).first()
 
@@ -303,13 +285,7 @@ def get_players_achievements(players_ids: List[str]) -> List[PlayerAchievements]
 
     result = []
 
-    mg.connect(
-        db=Config.db_name,
-        username=Config.db_user,
-        password=Config.db_pass,
-        host=Config.db_ip,
-        alias=Config.main_db_alias
-    )
+    mg.connect(**connection_params())
 
     achievements = models.Achievement.objects()
 
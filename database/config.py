@@ -3,6 +3,9 @@
         Copyright (C) 2019 - 2020 IU7Games Team.
 
         Модуль с общими переменными для БД
+
+        Параметры подключения читаются из окружения только при подключении,
+        поэтому модули БД импортируются и без настроенного окружения.
 """
 from os import environ
 from dataclasses import dataclass
@@ -11,10 +14,24 @@ from dataclasses import dataclass
 @dataclass
 class Config:
     """
-        Класс с названиями достижений игрока
+        Класс с названиями переменных окружения для подключения к БД
     """
-    db_name = environ['DB_NAME']
-    db_user = environ['DB_USER']
-    db_pass = environ['DB_PASS']
-    db_ip = environ['DB_IP']
+    db_name = 'DB_NAME'
+    db_user = 'DB_USER'
+    db_pass = 'DB_PASS'
+    db_ip = 'DB_IP'
     main_db_alias = 'main_db'
+
+
+def connection_params() -> dict:
+    """
+        Параметры подключения к основной БД из переменных окружения
+    """
+
+    return dict(
+        db=environ[Config.db_name],
+        username=environ[Config.db_user],
+        password=environ[Config.db_pass],
+        host=environ[Config.db_ip],
+        alias=Config.main_db_alias
+    )
@@ -15,17 +15,14 @@
 """
 
 import ctypes
-from timeit import Timer
-from time import process_time_ns
 from math import gcd
 from functools import reduce
 import games.utils.utils as utils
+import games.utils.timing as timing
 
 MAX_LBORDER = 1
 MAX_RBORDER = 22
 
-TIMEIT_REPEATS = 301
-
 
 def lcm(interval):
     """
@@ -46,28 +43,21 @@ def round_intervals():
     return {"l_border": left_border, "r_border": right_border, "solution": solution}
 
 
-def player_results(player_lib, intervals):
+def player_results(player_lib, lib_path, intervals):
     """
-        Получение и обработка результатов игрока. Подсчёт времени выполнения его функции.
+        Проверка ответа игрока. Для верного ответа возвращает источник
+        замеров времени выполнения его функции, для неверного - None.
     """
 
     player_solution = player_lib.numbers_game(
         intervals["l_border"], intervals["r_border"])
     if player_solution != intervals["solution"]:
-        return (utils.GameResult.fail, 0, 0)
-
-    def timeit_wrapper():
-        """
-            Обёртка для Timeit.
-        """
-
-        player_lib.numbers_game(intervals["l_border"], intervals["r_border"])
+        return None
 
-    time_results = Timer(timeit_wrapper, process_time_ns).repeat(
-        TIMEIT_REPEATS, 1)
-    median, dispersion = utils.process_time(time_results)
-
-    return (utils.GameResult.okay, median, dispersion)
+    return timing.native_series(
+        "bench_numbers", lib_path.encode(utils.Constants.utf_8),
+        ctypes.c_int(intervals["l_border"]), ctypes.c_int(intervals["r_border"])
+    )
 
 
 def print_conditions(intervals):
@@ -86,20 +76,28 @@ def print_conditions(intervals):
 def start_numbers_game(players_info):
     """
         Открытие библиотеки с функциями игроков, подсчёт времени исполнения их функций,
-        печать результатов.
+        печать результатов. Функции игроков с верным ответом замеряются вперемешку.
     """
 
     utils.redirect_ctypes_stdout()
     intervals = round_intervals()
     print_conditions(intervals)
     results = []
+    sources = {}
 
-    for player_lib in players_info:
+    for ind, player_lib in enumerate(players_info):
         if player_lib != "NULL":
             lib = ctypes.CDLL(player_lib)
-            results.append(player_results(lib, intervals))
+            source = player_results(lib, player_lib, intervals)
+            if source is not None:
+                sources[ind] = source
+            results.append((utils.GameResult.fail, 0, 0, None))
         else:
-            results.append((utils.GameResult.no_result, 0, 0))
+            results.append((utils.GameResult.no_result, 0, 0, None))
+
+    for ind, measurement in timing.measure_players(sources, players_info).items():
+        results[ind] = (utils.GameResult.okay, measurement.median,
+                        measurement.sigma, measurement.counters)
 
     utils.print_time_results(results, players_info)
     return results
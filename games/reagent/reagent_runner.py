@@ -28,7 +28,7 @@
 """
 
 import ctypes
-from random import choice
+from random import choice, seed
 from dataclasses import dataclass
 import games.utils.utils as utils
 
@@ -242,10 +242,13 @@ def create_c_objects(field_size):
     return c_strings, c_strings_copy, c_gamefield
 
 
-def start_reagent_competition(players_info, field_size):
+def start_reagent_competition(players_info, field_size, conditions_seed=None,
+                              keep_best=True):
     """
         Запуск игры для каждого игрока.
-        Подсчет очков.
+        Подсчет очков: при keep_best не меньше прошлого результата игрока,
+        иначе очки этого запуска.
+        При заданном conditions_seed игра каждого игрока одинакова от запуска к запуску.
     """
 
     if field_size == 10:
@@ -258,6 +261,9 @@ def start_reagent_competition(players_info, field_size):
             results.append(utils.GameResult.no_result)
             continue
 
+        if conditions_seed is not None:
+            seed(conditions_seed)
+
         player_lib = ctypes.CDLL(player[0])
 
         c_strings, c_strings_copy, gamefield = create_c_objects(field_size)
@@ -318,7 +324,7 @@ def start_reagent_competition(players_info, field_size):
         points += add_empty_field_points(c_strings, field_size)
         points += count_moves
 
-        results.append(points if points > player[1] else player[1])
+        results.append(points if points > player[1] or not keep_best else player[1])
 
     print(f"\033[32mRESULTS: {results}\033[0m")
 
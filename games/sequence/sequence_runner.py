@@ -14,13 +14,10 @@
 """
 
 import ctypes
-from random import randint
+from random import randint, seed
 from functools import reduce
-from timeit import Timer
-from time import process_time_ns
 import games.utils.utils as utils
-
-TIMEIT_REPEATS = 100001
+import games.utils.timing as timing
 
 ARRAY_LENGTH = 1000
 INTERVAL_LENGTH = 13
@@ -54,47 +51,50 @@ def generate_game_conditions():
     return {"array": array, "solution": solution}
 
 
-def player_results(game_conditions, player_lib):
+def player_results(game_conditions, player_lib, lib_path):
     """
-        Подсчёт времени выполнения стратегии игрока и проверка корректности его ответа.
+        Проверка корректности ответа игрока. Для верного ответа возвращает
+        источник замеров времени выполнения его стратегии, для неверного - None.
     """
 
     c_array = (ctypes.c_int * ARRAY_LENGTH)(*game_conditions["array"])
     player_solution = player_lib.sequence_game(c_array)
 
     if player_solution != game_conditions["solution"]:
-        return (utils.GameResult.fail, 0, 0)
-
-    def timeit_wrapper():
-        """
-            Обёртка для Timeit.
-        """
-
-        player_lib.sequence_game(c_array)
+        return None
 
-    time_results = Timer(timeit_wrapper, process_time_ns).repeat(
-        TIMEIT_REPEATS, 1)
-    median, dispersion = utils.process_time(time_results)
+    return timing.native_series(
+        "bench_sequence", lib_path.encode(utils.Constants.utf_8), c_array)
 
-    return (utils.GameResult.okay, median, dispersion)
 
-
-def start_sequence_game(players_libs):
+def start_sequence_game(players_libs, conditions_seed=None):
     """
         Открытие функции с библиотеками игроков, запуск их функций, печать результатов.
+        При заданном conditions_seed массив для игры одинаков от запуска к запуску.
+        Стратегии игроков с верным ответом замеряются вперемешку.
     """
 
     utils.redirect_ctypes_stdout()
+    if conditions_seed is not None:
+        seed(conditions_seed)
     game_conditions = generate_game_conditions()
     results = []
+    sources = {}
 
-    for lib in players_libs:
+    for ind, lib in enumerate(players_libs):
         if lib != "NULL":
             player_lib = ctypes.CDLL(lib)
             player_lib.sequence_game.restype = ctypes.c_longlong
-            results.append(player_results(game_conditions, player_lib))
+            source = player_results(game_conditions, player_lib, lib)
+            if source is not None:
+                sources[ind] = source
+            results.append((utils.GameResult.fail, 0, 0, None))
         else:
-            results.append((utils.GameResult.no_result, 0, 0))
+            results.append((utils.GameResult.no_result, 0, 0, None))
+
+    for ind, measurement in timing.measure_players(sources, players_libs).items():
+        results[ind] = (utils.GameResult.okay, measurement.median,
+                        measurement.sigma, measurement.counters)
 
     utils.print_time_results(results, players_libs)
     return results
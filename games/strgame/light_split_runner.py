@@ -15,7 +15,7 @@ def light_split_runner(player_lib_path, tests_path):
         Запуск функции split игрока используя основной раннер.
     """
 
-    solution, _, _ = start_split(player_lib_path, tests_path)
+    solution, _, _, _ = start_split([player_lib_path], tests_path)[0]
 
     print(f"\033[0;32mSPLIT OK\033[0m\nSOLUTION: {'OK' if solution == 0 else 'FAIL'}")
 
@@ -15,7 +15,7 @@ def light_strtok_runner(player_lib_path, tests_path):
         Запуск strtok функции используя основной раннер.
     """
 
-    solution, _, _, = start_strtok(player_lib_path, tests_path)
+    solution, _, _, _ = start_strtok([player_lib_path], tests_path)[0]
 
     print(f"\033[0;32mSTRTOK OK\033[0m\nSOLUTION: {'OK' if solution == 0 else 'FAIL'}")
 
@@ -20,9 +20,8 @@
 
 import ctypes
 from functools import partial
-from time import process_time_ns
-from timeit import Timer
 import games.utils.utils as utils
+import games.utils.timing as timing
 
 
 INCORRECT_LEN = 1
@@ -31,7 +30,6 @@ INCORRECT_TEST = 2
 STRING_MULTIPLIER = 2400  # FIXME
 WORDS_COUNT = 5200 * STRING_MULTIPLIER
 MAX_LEN_WORD = 17
-TIMEIT_REPEATS = 11
 
 
 def create_c_objects(bytes_string, delimiter):
@@ -91,24 +89,15 @@ def check_split_correctness(player_size, player_string_array, correct_string_arr
     return utils.GameResult.okay
 
 
-def split_time_counter(lib_player, c_string, c_array_pointer, c_delimiter):
+def split_source(lib_path, c_string, c_array_pointer, delimiter):
     """
-        Запуск split без проверки на корректность действий,
-        для замеров времени. Подсчёт медианы и среднеквадр. отклонения.
+        Источник замеров времени split игрока без проверки на корректность действий.
     """
 
-    def timeit_wrapper():
-        """
-            Обёртка для timeit.
-        """
-
-        lib_player.split(c_string, c_array_pointer, c_delimiter)
-
-    run_time_info = Timer(
-        timeit_wrapper, process_time_ns).repeat(TIMEIT_REPEATS, 1)
-    median, dispersion = utils.process_time(run_time_info)
-
-    return median, dispersion
+    return timing.native_series(
+        "bench_split", lib_path.encode(utils.Constants.utf_8), c_string,
+        c_array_pointer, ctypes.c_char(delimiter.encode(utils.Constants.utf_8))
+    )
 
 
 def ctypes_wrapper(player_lib, move, c_string, c_array_pointer, c_delim):
@@ -131,11 +120,27 @@ def check_segfault(size):
     return False
 
 
-def run_split_test(lib_player, delimiter, test_data):
+def check_split_test(lib_player, c_string, c_array_pointer, c_delim, correct_split):
+    """
+        Вызов функции split игрока и сравнение её результата
+        с результатом split из Python.
+    """
+
+    player_size = utils.call_libary(
+        lib_player, ctypes_wrapper, 'i', utils.Error.segfault, c_string, c_array_pointer, c_delim)
+
+    if check_segfault(player_size):
+        return utils.Error.segfault
+
+    player_size = lib_player.split(c_string, c_array_pointer, c_delim)
+
+    return check_split_correctness(player_size, c_array_pointer, correct_split)
+
+
+def run_split_test(players_libs, delimiter, test_data):
     """
-        Вызов функций split, сравнения поведения функции
-        из Python и функции игрока реализованной в СИ.
-        Замеры времени.
+        Проверка функций split игроков на общих входных данных.
+        Функции с верным результатом замеряются вперемешку.
     """
 
     correct_split = test_data.split(delimiter)
@@ -147,44 +152,47 @@ def run_split_test(lib_player, delimiter, test_data):
         bytes_string, delimiter)
     utils.print_memory_usage("SPLIT FINAL MEMORY ALLOCATED")
 
-    player_size = utils.call_libary(
-        lib_player, ctypes_wrapper, 'i', utils.Error.segfault, c_string, c_array_pointer, c_delim)
+    results = []
+    sources = {}
 
-    if check_segfault(player_size):
-        return 0.0, utils.Error.segfault, 0.0
+    for ind, lib_path in enumerate(players_libs):
+        if lib_path == "NULL":
+            results.append(None)
+            continue
 
-    player_size = lib_player.split(c_string, c_array_pointer, c_delim)
-    error_code = check_split_correctness(
-        player_size, c_array_pointer, correct_split)
+        print(f"{utils.parsing_name(lib_path)}:")
+        error_code = check_split_test(
+            ctypes.CDLL(lib_path), c_string, c_array_pointer, c_delim, list(correct_split))
 
-    if error_code == utils.GameResult.okay:
-        run_time, dispersion = split_time_counter(
-            lib_player, c_string, c_array_pointer, c_delim)
-    else:
-        run_time, dispersion = 0.0, 0.0
+        if error_code == utils.GameResult.okay:
+            sources[ind] = split_source(lib_path, c_string, c_array_pointer, delimiter)
+        results.append((error_code, 0.0, 0.0, None))
 
-    return run_time, error_code, dispersion
+    for ind, measurement in timing.measure_players(sources, players_libs).items():
+        results[ind] = (utils.GameResult.okay, measurement.median,
+                        measurement.sigma, measurement.counters)
 
+    return results
 
-def start_split(player_lib_name, tests_path):
+
+def start_split(players_libs, tests_path):
     """
-        Открытие файлов с тестами и запуск split.
-        Печать количество успешных тестов и время ранинга.
+        Открытие файла с тестом и запуск split для каждого игрока.
+        Печать результатов игроков.
     """
 
     # utils.redirect_ctypes_stdout()
     utils.print_memory_usage("SPLIT START")
 
-    lib_player = ctypes.CDLL(player_lib_name)
-    incorrect_test, total_time, dispersion = utils.strgame_runner(
+    results = utils.strgame_runner(
         tests_path,
-        partial(run_split_test, lib_player, utils.Constants.split_delemiter)
+        partial(run_split_test, players_libs, utils.Constants.split_delemiter)
     )
 
-    utils.print_strgame_results(
-        "SPLIT", incorrect_test, total_time, dispersion)
-    return incorrect_test, total_time, dispersion
+    utils.print_time_results(results, players_libs)
+
+    return results
 
 
 if __name__ == "__main__":
-    start_split("games/strgame/split_lib.so", "games/strgame/tests/split")
+    start_split(["games/strgame/split_lib.so"], "games/strgame/tests/split")
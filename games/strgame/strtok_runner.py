@@ -17,14 +17,11 @@
 
 
 import ctypes
-from timeit import Timer
-from time import process_time_ns
 from functools import partial
 import games.utils.utils as utils
+import games.utils.timing as timing
 
 STRING_MULTIPLIER = 1500
-TIMEIT_REPEATS = 1
-TIME_COUNTER_REPEATS = 11
 
 
 def check_strtok_correctness(player_ptr, correct_ptr):
@@ -76,49 +73,25 @@ def strtok_iteration(c_delimiters_string, c_string_player, c_string, libs):
     return error_code, libary_ptr
 
 
-def strtok_time_counter(test_data, delimiters, iterations, player_lib_name):
+def strtok_source(c_source, c_string, c_delimiters, iterations, player_lib_name):
     """
-        Запуск strtok без проверки на корректность действий,
-        для замеров времени.
+        Источник замеров времени strtok игрока без проверки на корректность действий.
+        Обвязка копирует исходную строку перед каждым вызовом вне замера:
+        strtok её портит.
     """
 
-    test_data *= STRING_MULTIPLIER
-    bytes_string = test_data.encode(utils.Constants.utf_8)
-    iterations *= STRING_MULTIPLIER
-
-    c_strtok_timer = ctypes.CDLL("strtok_timer.so")
-    player_name = ctypes.create_string_buffer(
-        player_lib_name.encode(utils.Constants.utf_8))
-    run_time_info = []
-
-    def timeit_wrapper():
-        """
-            Обёртка для timeit.
-        """
-
-        c_strtok_timer.strtok_wrapper(
-            player_name, c_string_player,
-            c_delimiters_string, ctypes.c_int(iterations)
-        )
-
-    for _ in range(TIME_COUNTER_REPEATS):
-        c_delimiters_string, _, c_string_player = \
-            create_c_objects(
-                bytes_string, delimiters.encode(utils.Constants.utf_8))
-
-        run_time_info.append(
-            Timer(timeit_wrapper, process_time_ns).timeit(TIMEIT_REPEATS))
-
-    median, dispersion = utils.process_time(run_time_info)
-    return median, dispersion
+    return timing.native_series(
+        "bench_strtok", player_lib_name.encode(utils.Constants.utf_8),
+        c_source, c_string, ctypes.c_size_t(ctypes.sizeof(c_source)),
+        c_delimiters, ctypes.c_int(iterations)
+    )
 
 
-def run_strtok_test(delimiters, libs, player_name, test_data):
+def check_strtok_test(delimiters, libs, test_data):
     """
         Запуск функции strtok, пока исходная строка не будет
         полностью уничтожена (функция strtok вернёт NULL).
-        Сначала тестируется корректность работы функции, далее
-        замеряется время работы.
+        Возвращает код ошибки и число вызовов после первого.
     """
 
     bytes_string = test_data.encode(utils.Constants.utf_8)
@@ -135,40 +108,67 @@ def run_strtok_test(delimiters, libs, player_name, test_data):
             c_delimiters_string, utils.Constants.null, utils.Constants.null, libs)
         iterations += 1
 
-    if error_code == utils.GameResult.okay:
-        run_time, dispersion = strtok_time_counter(
-            test_data, delimiters, iterations, player_name)
-    else:
-        run_time, dispersion = 0.0, 0.0
+    return error_code, iterations
+
+
+def run_strtok_test(delimiters, players_libs, test_data):
+    """
+        Проверка функций strtok игроков на тестовой строке.
+        Функции с верным результатом замеряются вперемешку
+        на строке, повторённой STRING_MULTIPLIER раз.
+    """
+
+    libc = ctypes.CDLL("libc.so.6")
+    libc.strtok.restype = ctypes.POINTER(ctypes.c_char)
+
+    c_source = ctypes.create_string_buffer(
+        (test_data * STRING_MULTIPLIER).encode(utils.Constants.utf_8))
+    c_string = ctypes.create_string_buffer(ctypes.sizeof(c_source))
+    c_delimiters = ctypes.create_string_buffer(delimiters.encode(utils.Constants.utf_8))
+
+    results = []
+    sources = {}
+
+    for ind, player_lib_name in enumerate(players_libs):
+        if player_lib_name == "NULL":
+            results.append(None)
+            continue
 
-    return run_time, error_code, dispersion
+        print(f"{utils.parsing_name(player_lib_name)}:")
+        lib_player = ctypes.CDLL(player_lib_name)
+        lib_player.strtok.restype = ctypes.POINTER(ctypes.c_char)
+        error_code, iterations = check_strtok_test(
+            delimiters, {"player": lib_player, "libary": libc}, test_data)
 
+        if error_code == utils.GameResult.okay:
+            sources[ind] = strtok_source(c_source, c_string, c_delimiters,
+                                         iterations * STRING_MULTIPLIER, player_lib_name)
+        results.append((error_code, 0.0, 0.0, None))
 
-def start_strtok(player_lib_name, tests_path):
+    for ind, measurement in timing.measure_players(sources, players_libs).items():
+        results[ind] = (utils.GameResult.okay, measurement.median,
+                        measurement.sigma, measurement.counters)
+
+    return results
+
+
+def start_strtok(players_libs, tests_path):
     """
-        Открытие библиотек, запуск ранера, печать результатов.
+        Открытие файла с тестом, запуск ранера для каждого игрока, печать результатов.
     """
 
     # utils.redirect_ctypes_stdout()
     utils.print_memory_usage("STRTOK START")
 
-    lib_player = ctypes.CDLL(player_lib_name)
-    libc = ctypes.CDLL("libc.so.6")
-    libc.strtok.restype = ctypes.POINTER(ctypes.c_char)
-    lib_player.strtok.restype = ctypes.POINTER(ctypes.c_char)
-    libs = {"player": lib_player, "libary": libc}
-
-    incorrect_test, total_time, dispersion = utils.strgame_runner(
+    results = utils.strgame_runner(
         tests_path,
-        partial(run_strtok_test, utils.Constants.strtok_delimiters,
-                libs, player_lib_name)
+        partial(run_strtok_test, utils.Constants.strtok_delimiters, players_libs)
     )
 
-    utils.print_strgame_results(
-        "STRTOK", incorrect_test, total_time, dispersion)
+    utils.print_time_results(results, players_libs)
 
-    return incorrect_test, total_time, dispersion
+    return results
 
 
 if __name__ == "__main__":
-    start_strtok("games/strgame/strtok_lib.so", "games/strgame/tests/strtok")
+    start_strtok(["games/strgame/strtok_lib.so"], "games/strgame/tests/strtok")
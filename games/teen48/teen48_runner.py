@@ -22,7 +22,7 @@
 """
 
 import ctypes
-from random import randint, random
+from random import randint, random, seed
 import games.utils.utils as utils
 
 
@@ -291,11 +291,14 @@ def ctypes_wrapper(player_lib, move, game_field):
     move.value = player_lib.teen48game(game_field).decode('utf-8')
 
 
-def start_teen48game_competition(players_info, field_size):
+def start_teen48game_competition(players_info, field_size, conditions_seed=None,
+                                 keep_best=True):
     """
         Создание игрового поля и запуск игры для каждого
         игрока, подсчёт его очков. Если количество очков менее, чем
-        было набрано в прошлый раз, то очки не обновляются.
+        было набрано в прошлый раз, то очки не обновляются
+        (при keep_best=False возвращаются очки этого запуска).
+        При заданном conditions_seed игра каждого игрока одинакова от запуска к запуску.
     """
 
     if field_size == 4:
@@ -308,6 +311,9 @@ def start_teen48game_competition(players_info, field_size):
             results.append(utils.GameResult.no_result)
             continue
 
+        if conditions_seed is not None:
+            seed(conditions_seed)
+
         player_lib = ctypes.CDLL(player[0])
         player_lib.teen48game.argtypes = [Matrix]
         player_lib.teen48game.restype = ctypes.c_char
@@ -350,7 +356,7 @@ def start_teen48game_competition(players_info, field_size):
             prev_move = move
 
         score = scoring(game_field)
-        results.append(score if score > player[1] else player[1])
+        results.append(score if score > player[1] or not keep_best else player[1])
         print_field(game_field, utils.parsing_name(
             player[0]), score, field_size)
 
@@ -16,7 +16,7 @@
 
 import ctypes
 from dataclasses import dataclass
-from random import randint
+from random import randint, seed
 import games.utils.utils as utils
 
 
@@ -365,11 +365,13 @@ def create_c_objects():
     return c_strings, c_strings_copy, c_gamefield
 
 
-def start_tetris_competition(players_info):
+def start_tetris_competition(players_info, conditions_seed=None, keep_best=True):
     """
         Создание игрового поля.
         Запуск игры для каждого игрока.
-        Подсчет очков.
+        Подсчет очков: при keep_best не меньше прошлого результата игрока,
+        иначе очки этого запуска.
+        При заданном conditions_seed игра каждого игрока одинакова от запуска к запуску.
     """
 
     utils.redirect_ctypes_stdout()
@@ -381,6 +383,9 @@ def start_tetris_competition(players_info):
             results.append(utils.GameResult.no_result)
             continue
 
+        if conditions_seed is not None:
+            seed(conditions_seed)
+
         player_lib = ctypes.CDLL(player[0])
 
         c_strings, c_strings_copy, gamefield = create_c_objects()
@@ -429,7 +434,7 @@ def start_tetris_competition(players_info):
                 print_now_score(player[0], points)
                 game = False
 
-        results.append(points if points > player[1] else player[1])
+        results.append(points if points > player[1] or not keep_best else player[1])
 
     print(f"\033[33mRESULTS: {results}\033[0m")
 
@@ -15,7 +15,7 @@ def light_travel_runner(player_lib_path, test_path):
         Запуск стратегии игрока на тестовых значениях.
     """
 
-    solution, _, _ = start_travel_game([player_lib_path], test_path)[0]
+    solution, _, _, _ = start_travel_game([player_lib_path], test_path)[0]
     print(
         f"\033[0;32mTRAVELGAME: OKAY\033[0m\nSOLUTION: {'OK' if solution == 0 else 'FAIL'}")
 
@@ -22,12 +22,9 @@
 """
 
 import ctypes
-from random import randint
-from timeit import Timer
-from time import process_time_ns
+from random import randint, seed
 import games.utils.utils as utils
-
-TIMEIT_REPEATS = 10000
+import games.utils.timing as timing
 
 MAX_LEN_AIRPORTS_NAME = 4
 MAX_COUNT_FLIGHTS = 86395
@@ -175,7 +172,8 @@ def check_flights(player_count, c_pointer, array_flights, count_flights):
 def player_results(lib_path, test_path, c_pointer, file_pointer, route, array_flights, rewind):
     """
        Получение и обработка результатов игрока.
-       Подсчет времени выполнения функции игрока
+       Возвращает результат игрока и источник замеров времени выполнения
+       его функции (None, если функция не прошла проверки).
     """
     player_lib = ctypes.CDLL(lib_path)
     player_lib.travel_game.argtypes = [ctypes.POINTER(ctypes.POINTER(ctypes.c_int)),
@@ -186,7 +184,7 @@ def player_results(lib_path, test_path, c_pointer, file_pointer, route, array_fl
         player_lib, ctypes_wrapper, 'i', utils.Error.segfault, c_pointer, file_pointer, route)
 
     if check_segfault(player_count):
-        return (utils.Error.segfault, 0, 0)
+        return (utils.Error.segfault, 0, 0, None), None
 
     rewind(file_pointer)
 
@@ -195,7 +193,7 @@ def player_results(lib_path, test_path, c_pointer, file_pointer, route, array_fl
         player_count, c_pointer, array_flights, len(array_flights))
 
     if error_code != utils.GameResult.okay:
-        return (utils.GameResult.fail, 0, 0)
+        return (utils.GameResult.fail, 0, 0, None), None
 
     memory_leak_check_res = utils.memory_leak_check(
         SAMPLE_PATH, lib_path,
@@ -211,22 +209,13 @@ def player_results(lib_path, test_path, c_pointer, file_pointer, route, array_fl
         return (
             utils.Error.memory_leak if memory_leak_check_res > 0
             else utils.Error.memory_leak_check_error,
-            0, 0
-        )
-
-    def timeit_wrapper():
-        """
-           Обертка для Timeit.
-        """
-        rewind(file_pointer)
-        player_lib.travel_game(c_pointer, file_pointer, route)
-
-    time_results = Timer(timeit_wrapper, process_time_ns).repeat(
-        TIMEIT_REPEATS, 1)
-
-    median, dispersion = utils.process_time(time_results)
+            0, 0, None
+        ), None
 
-    return (utils.GameResult.okay, median, dispersion)
+    return (utils.GameResult.okay, 0, 0, None), timing.native_series(
+        "bench_travel", lib_path.encode(utils.Constants.utf_8),
+        c_pointer, file_pointer, route
+    )
 
 
 def get_c_functions():
@@ -251,13 +240,30 @@ def get_c_functions():
     return fopen, rewind, fclose
 
 
-def start_travel_game(players_info, test_path):
+def init_harness():
+    """
+        Сигнатура функции замеров из bench_harness.so:
+        указатель на FILE и структура Flight передаются как в travel_game.
+    """
+
+    bench_travel = timing.harness().bench_travel
+    bench_travel.argtypes = [ctypes.c_char_p, ctypes.POINTER(ctypes.POINTER(ctypes.c_int)),
+                             ctypes.c_void_p, Flight, ctypes.POINTER(ctypes.c_longlong),
+                             ctypes.c_int, ctypes.c_int]
+    bench_travel.restype = ctypes.c_int
+
+
+def start_travel_game(players_info, test_path, conditions_seed=None):
     """
        Открытие библиотеки с функциями игроков.
        Подсчет времени выполнения их функций.
        Получение результатов.
+       При заданном conditions_seed рейс для игры одинаков от запуска к запуску.
+       Функции игроков, прошедшие проверки, замеряются вперемешку.
     """
     utils.redirect_ctypes_stdout()
+    if conditions_seed is not None:
+        seed(conditions_seed)
 
     with open(test_path + FILE_FLIGHTS, "r") as file_flights:
         test_data = create_test(file_flights)
@@ -267,6 +273,7 @@ def start_travel_game(players_info, test_path):
     print_conditions(test_data, array_flights)
 
     fopen, rewind, fclose = get_c_functions()
+    init_harness()
 
     mode = init_string("r")
     file_name = init_string(test_path + FILE_FLIGHTS)
@@ -276,18 +283,24 @@ def start_travel_game(players_info, test_path):
     route = Flight(test_data)
 
     results = []
+    sources = {}
 
-    for player_lib in players_info:
+    for ind, player_lib in enumerate(players_info):
         if player_lib == "NULL":
-            results.append((utils.GameResult.no_result, 0, 0))
+            results.append((utils.GameResult.no_result, 0, 0, None))
             continue
 
         rewind(file_pointer)
 
-        results.append(
-            player_results(player_lib, test_path, c_pointer, file_pointer, route,
-                           array_flights, rewind)
-        )
+        result, source = player_results(player_lib, test_path, c_pointer, file_pointer,
+                                        route, array_flights, rewind)
+        results.append(result)
+        if source is not None:
+            sources[ind] = source
+
+    for ind, measurement in timing.measure_players(sources, players_info).items():
+        results[ind] = (utils.GameResult.okay, measurement.median,
+                        measurement.sigma, measurement.counters)
 
     fclose(file_pointer)
 
@@ -0,0 +1,321 @@
+#define _GNU_SOURCE
+
+#include <stdio.h>
+#include <string.h>
+#include <time.h>
+#include <dlfcn.h>
+#include <unistd.h>
+#include <sys/ioctl.h>
+#include <sys/syscall.h>
+#include <linux/perf_event.h>
+
+#define BENCH_CLOCK CLOCK_PROCESS_CPUTIME_ID
+
+#define BENCH_OK 0
+#define BENCH_NO_LIB -1
+#define BENCH_NO_SYMBOL -2
+#define BENCH_NO_COUNTERS -3
+
+#define COUNTERS_COUNT 4
+
+typedef struct
+{
+    char origin[4];
+    char destination[4];
+    int month;
+    int day;
+} Flight;
+
+static volatile long long sink;
+
+static const unsigned long long counter_events[COUNTERS_COUNT] = {
+    PERF_COUNT_HW_INSTRUCTIONS,
+    PERF_COUNT_HW_CPU_CYCLES,
+    PERF_COUNT_HW_CACHE_MISSES,
+    PERF_COUNT_HW_BRANCH_MISSES
+};
+
+static int counter_fds[COUNTERS_COUNT] = { -1, -1, -1, -1 };
+static double counter_totals[COUNTERS_COUNT];
+static long long counter_calls;
+
+void bench_counters_close(void)
+{
+    for (int i = COUNTERS_COUNT - 1; i >= 0; i--)
+    {
+        if (counter_fds[i] != -1)
+        {
+            close(counter_fds[i]);
+            counter_fds[i] = -1;
+        }
+    }
+}
+
+int bench_counters_open(void)
+{
+    struct perf_event_attr attr;
+
+    if (counter_fds[0] != -1)
+    {
+        return BENCH_OK;
+    }
+
+    for (int i = 0; i < COUNTERS_COUNT; i++)
+    {
+        memset(&attr, 0, sizeof(attr));
+        attr.size = sizeof(attr);
+        attr.type = PERF_TYPE_HARDWARE;
+        attr.config = counter_events[i];
+        attr.disabled = i == 0;
+        attr.exclude_kernel = 1;
+        attr.exclude_hv = 1;
+        attr.read_format = PERF_FORMAT_GROUP |
+                           PERF_FORMAT_TOTAL_TIME_ENABLED | PERF_FORMAT_TOTAL_TIME_RUNNING;
+
+        counter_fds[i] = syscall(__NR_perf_event_open, &attr, 0, -1, counter_fds[0], 0);
+        if (counter_fds[i] == -1)
+        {
+            bench_counters_close();
+            return BENCH_NO_COUNTERS;
+        }
+    }
+
+    return BENCH_OK;
+}
+
+void bench_counters_reset(void)
+{
+    memset(counter_totals, 0, sizeof(counter_totals));
+    counter_calls = 0;
+}
+
+long long bench_counters_read(double *values)
+{
+    memcpy(values, counter_totals, sizeof(counter_totals));
+    return counter_calls;
+}
+
+static void counters_start(void)
+{
+    if (counter_fds[0] != -1)
+    {
+        ioctl(counter_fds[0], PERF_EVENT_IOC_RESET, PERF_IOC_FLAG_GROUP);
+        ioctl(counter_fds[0], PERF_EVENT_IOC_ENABLE, PERF_IOC_FLAG_GROUP);
+    }
+}
+
+static void counters_stop(int calls)
+{
+    unsigned long long group[3 + COUNTERS_COUNT];
+
+    if (counter_fds[0] == -1)
+    {
+        return;
+    }
+
+    ioctl(counter_fds[0], PERF_EVENT_IOC_DISABLE, PERF_IOC_FLAG_GROUP);
+
+    if (read(counter_fds[0], group, sizeof(group)) != sizeof(group) || group[2] == 0)
+    {
+        return;
+    }
+
+    for (int i = 0; i < COUNTERS_COUNT; i++)
+    {
+        counter_totals[i] += (double)group[3 + i] * group[1] / group[2];
+    }
+    counter_calls += calls;
+}
+
+static long long elapsed_ns(const struct timespec *start, const struct timespec *end)
+{
+    return (end->tv_sec - start->tv_sec) * 1000000000LL + (end->tv_nsec - start->tv_nsec);
+}
+
+static void *open_symbol(const char *lib_path, const char *symbol, void **player_lib, int *error)
+{
+    void *function = NULL;
+
+    *player_lib = dlopen(lib_path, RTLD_NOW);
+    if (*player_lib == NULL)
+    {
+        *error = BENCH_NO_LIB;
+        return NULL;
+    }
+
+    function = dlsym(*player_lib, symbol);
+    if (function == NULL)
+    {
+        dlclose(*player_lib);
+        *error = BENCH_NO_SYMBOL;
+        return NULL;
+    }
+
+    *error = BENCH_OK;
+    return function;
+}
+
+int bench_numbers(const char *lib_path, int left, int right,
+                  long long *samples, int count, int loops)
+{
+    void *player_lib;
+    int error;
+    struct timespec start, end;
+    int (*numbers_game)(int, int);
+
+    *(void **)(&numbers_game) = open_symbol(lib_path, "numbers_game", &player_lib, &error);
+    if (error != BENCH_OK)
+    {
+        return error;
+    }
+
+    for (int i = 0; i < count; i++)
+    {
+        counters_start();
+        clock_gettime(BENCH_CLOCK, &start);
+        for (int j = 0; j < loops; j++)
+        {
+            sink = numbers_game(left, right);
+        }
+        clock_gettime(BENCH_CLOCK, &end);
+        counters_stop(loops);
+        samples[i] = elapsed_ns(&start, &end);
+    }
+
+    dlclose(player_lib);
+    return BENCH_OK;
+}
+
+int bench_sequence(const char *lib_path, int *array,
+                   long long *samples, int count, int loops)
+{
+    void *player_lib;
+    int error;
+    struct timespec start, end;
+    long long (*sequence_game)(int *);
+
+    *(void **)(&sequence_game) = open_symbol(lib_path, "sequence_game", &player_lib, &error);
+    if (error != BENCH_OK)
+    {
+        return error;
+    }
+
+    for (int i = 0; i < count; i++)
+    {
+        counters_start();
+        clock_gettime(BENCH_CLOCK, &start);
+        for (int j = 0; j < loops; j++)
+        {
+            sink = sequence_game(array);
+        }
+        clock_gettime(BENCH_CLOCK, &end);
+        counters_stop(loops);
+        samples[i] = elapsed_ns(&start, &end);
+    }
+
+    dlclose(player_lib);
+    return BENCH_OK;
+}
+
+int bench_split(const char *lib_path, const char *string, char **matrix, const char symbol,
+                long long *samples, int count, int loops)
+{
+    void *player_lib;
+    int error;
+    struct timespec start, end;
+    int (*split)(const char *, char **, const char);
+
+    *(void **)(&split) = open_symbol(lib_path, "split", &player_lib, &error);
+    if (error != BENCH_OK)
+    {
+        return error;
+    }
+
+    for (int i = 0; i < count; i++)
+    {
+        counters_start();
+        clock_gettime(BENCH_CLOCK, &start);
+        for (int j = 0; j < loops; j++)
+        {
+            sink = split(string, matrix, symbol);
+        }
+        clock_gettime(BENCH_CLOCK, &end);
+        counters_stop(loops);
+        samples[i] = elapsed_ns(&start, &end);
+    }
+
+    dlclose(player_lib);
+    return BENCH_OK;
+}
+
+int bench_travel(const char *lib_path, int **result, FILE *flights, const Flight route,
+                 long long *samples, int count, int loops)
+{
+    void *player_lib;
+    int error;
+    struct timespec start, end;
+    int (*travel_game)(int **, FILE *const, const Flight);
+
+    *(void **)(&travel_game) = open_symbol(lib_path, "travel_game", &player_lib, &error);
+    if (error != BENCH_OK)
+    {
+        return error;
+    }
+
+    for (int i = 0; i < count; i++)
+    {
+        counters_start();
+        clock_gettime(BENCH_CLOCK, &start);
+        for (int j = 0; j < loops; j++)
+        {
+            rewind(flights);
+            sink = travel_game(result, flights, route);
+        }
+        clock_gettime(BENCH_CLOCK, &end);
+        counters_stop(loops);
+        samples[i] = elapsed_ns(&start, &end);
+    }
+
+    dlclose(player_lib);
+    return BENCH_OK;
+}
+
+int bench_strtok(const char *lib_path, const char *source, char *string, const size_t length,
+                 const char *delim, const int iterations,
+                 long long *samples, int count, int loops)
+{
+    void *player_lib;
+    int error;
+    struct timespec start, end;
+    char *(*strtok)(char *, const char *);
+
+    *(void **)(&strtok) = open_symbol(lib_path, "strtok", &player_lib, &error);
+    if (error != BENCH_OK)
+    {
+        return error;
+    }
+
+    for (int i = 0; i < count; i++)
+    {
+        samples[i] = 0;
+        for (int j = 0; j < loops; j++)
+        {
+            memcpy(string, source, length);
+
+            counters_start();
+            clock_gettime(BENCH_CLOCK, &start);
+            sink = (long long)strtok(string, delim);
+            for (int k = 0; k < iterations; k++)
+            {
+                sink = (long long)strtok(NULL, delim);
+            }
+            clock_gettime(BENCH_CLOCK, &end);
+            counters_stop(1);
+
+            samples[i] += elapsed_ns(&start, &end);
+        }
+    }
+
+    dlclose(player_lib);
+    return BENCH_OK;
+}
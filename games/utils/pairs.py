@@ -0,0 +1,78 @@
+"""
+          ===== PAIRS STORE v.1.0 =====
+          Copyright (C) 2019 - 2020 IU7Games Team.
+
+        - Хранилище исходов раундов парных игр между запусками турнира.
+
+        - Ключ раунда - (SHA-256 библиотеки первого игрока, SHA-256 библиотеки
+        второго игрока, размер поля, сид). Раунд разыгрывается заново, только если
+        хотя бы одна из библиотек изменилась, иначе берётся сохранённый исход.
+
+        - Исходы хранятся в JSON: файл восстанавливается из артефактов
+        deploy job'а и не должен исполнять код при загрузке.
+"""
+
+import os
+import json
+
+
+def pair_key(first_hash, second_hash, field_size, seed=None):
+    """
+        Формирование ключа раунда.
+    """
+
+    return (first_hash, second_hash, field_size, seed)
+
+
+def load_pairs(dump_path):
+    """
+        Загрузка сохранённых исходов раундов.
+    """
+
+    if dump_path is None or not os.path.exists(dump_path):
+        return {}
+
+    try:
+        with open(dump_path, "r") as pairs_dump:
+            return {tuple(key): round_info for key, round_info in json.load(pairs_dump)}
+    except (ValueError, TypeError):
+        print(f"{dump_path} IS DAMAGED, ALL ROUNDS WILL BE PLAYED")
+        return {}
+
+
+def save_pairs(dump_path, pairs):
+    """
+        Сохранение исходов раундов текущего турнира.
+    """
+
+    if dump_path is None:
+        return
+
+    with open(dump_path, "w") as pairs_dump:
+        json.dump([[list(key), round_info] for key, round_info in pairs.items()], pairs_dump)
+
+
+def print_reused(stored, played):
+    """
+        Печать числа раундов турнира, исходы которых взяты из прошлого турнира.
+    """
+
+    reused = sum(key in stored for key in played)
+    print(f"ROUND RESULTS REUSED: {reused} OF {len(played)}")
+
+
+def play_round(stored, played, key, play):
+    """
+        Получение исхода раунда: сохранённого, если он есть,
+        иначе раунд разыгрывается функцией play.
+        Все использованные исходы попадают в played.
+    """
+
+    if key in stored:
+        round_info = stored[key]
+    else:
+        round_info = play()
+
+    played[key] = round_info
+
+    return round_info
@@ -0,0 +1,66 @@
+"""
+          ===== RATING UTILS v.1.0 =====
+          Copyright (C) 2019 - 2020 IU7Games Team.
+
+        - Модуль пакетного подсчёта рейтинга Эло для парных игр.
+
+        - Рейтинг считается одновременно по полному списку исходов игр:
+        ожидание и коэффициент каждой игры берутся от рейтинга до начала турнира,
+        а изменения суммируются. Итог не зависит от порядка игр, поэтому исходы
+        можно получать из любого количества процессов и считать рейтинг один раз.
+
+        - Исход игры - кортеж (индекс первого игрока, индекс второго игрока,
+        результат первого игрока), где результат: 1 - победа, 0.5 - ничья, 0 - поражение.
+"""
+
+from dataclasses import dataclass
+import games.utils.utils as utils
+
+
+@dataclass
+class RoundResult:
+    """
+        Результаты игры для первого игрока.
+    """
+    win = 1
+    draw = 0.5
+    loss = 0
+
+
+def make_outcome(player1_index, player2_index, player1_result):
+    """
+        Формирование исхода игры.
+    """
+
+    return (player1_index, player2_index, player1_result)
+
+
+def rating_deltas(points, outcomes):
+    """
+        Подсчёт суммарного изменения рейтинга каждого игрока
+        относительно рейтинга до начала турнира.
+    """
+
+    deltas = [0.0] * len(points)
+
+    for player1_index, player2_index, player1_result in outcomes:
+        pts1 = points[player1_index]
+        pts2 = points[player2_index]
+
+        deltas[player1_index] += utils.calculate_elo_rating(
+            pts1, pts2, player1_result) - pts1
+        deltas[player2_index] += utils.calculate_elo_rating(
+            pts2, pts1, RoundResult.win - player1_result) - pts2
+
+    return deltas
+
+
+def batch_elo_rating(points, outcomes):
+    """
+        Подсчёт рейтинга Эло по всем исходам турнира сразу.
+        Возвращает новый список рейтингов, исходный не изменяется.
+    """
+
+    deltas = rating_deltas(points, outcomes)
+
+    return [int(pts + delta) for pts, delta in zip(points, deltas)]
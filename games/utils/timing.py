@@ -0,0 +1,452 @@
+"""
+          ===== TIMING ENGINE v.1.0 =====
+          Copyright (C) 2019 - 2020 IU7Games Team.
+
+        - Модуль замеров времени работы стратегий в играх на время.
+
+        - Один замер (сэмпл) - время серии из loops вызовов, делённое на loops.
+        Число вызовов в серии подбирается так, чтобы серия длилась не меньше
+        Timing.min_sample_ns: для коротких функций накладные расходы таймера
+        и вызова из Python распределяются по всей серии.
+
+        - Замеры добавляются пачками, пока доверительный интервал медианы
+        не станет уже Timing.rel_ci_width от самой медианы или пока не наберётся
+        Timing.max_samples замеров.
+
+        - Итог: медиана, MAD (медианное абсолютное отклонение)
+        и бутстрэп-интервал медианы.
+
+        - Функции игроков на C замеряются нативной обвязкой bench_harness.so:
+        серии вызовов и таймер clock_gettime работают без интерпретатора,
+        в Python возвращаются только длительности серий.
+
+        - Окружение замеров: процесс закрепляется за выделенным ядром,
+        перед замерами выполняются прогревочные серии, а стратегии разных
+        игроков замеряются вперемешку (раунды A B ... B A), чтобы дрейф
+        частоты и фоновая нагрузка делились между игроками поровну.
+        По итогам печатается отчёт о шуме замеров.
+
+        - Если ядро разрешает perf_event_open, обвязка вместе со временем
+        считает аппаратные события (инструкции, такты, промахи кэша
+        и предсказателя переходов) вокруг замеряемых вызовов; в замер попадает
+        их среднее число на вызов. Без доступа к счётчикам замеры идут как обычно.
+"""
+
+import os
+import ctypes
+from math import ceil, sqrt
+from functools import lru_cache
+from contextlib import contextmanager
+from random import Random
+from statistics import median
+from dataclasses import dataclass
+
+
+@dataclass
+class Timing:
+    """
+        Константы движка замеров.
+    """
+    version = "adaptive-3"
+    harness = "bench_harness.so"
+
+    hardware_counters = True
+    counter_names = ("instructions", "cycles", "cache_misses", "branch_misses")
+
+    min_sample_ns = 1_000_000
+    max_loops = 1 << 20
+
+    min_samples = 15
+    max_samples = 301
+    batch_samples = 10
+    rel_ci_width = 0.02
+
+    z_score = 1.96
+    bootstrap_resamples = 1000
+    bootstrap_seed = 2020
+    confidence = 0.95
+
+    mad_to_sigma = 1.4826
+
+    warmup_series = 3
+    shared_cores = 1
+
+
+@dataclass
+class Measurement:
+    """
+        Результат замеров одной функции (время в наносекундах на вызов).
+    """
+    median: float
+    mad: float
+    ci_low: float
+    ci_high: float
+    samples: int
+    loops: int
+    counters: dict = None
+
+    @property
+    def sigma(self):
+        """
+            Оценка среднеквадратичного отклонения по MAD, устойчивая к выбросам.
+        """
+
+        return Timing.mad_to_sigma * self.mad
+
+    @property
+    def rel_mad(self):
+        """
+            MAD относительно медианы - шум замеров без учёта масштаба времени.
+        """
+
+        return self.mad / self.median if self.median > 0 else 0.0
+
+    @property
+    def rel_ci_width(self):
+        """
+            Ширина доверительного интервала относительно медианы.
+        """
+
+        return (self.ci_high - self.ci_low) / self.median if self.median > 0 else 0.0
+
+
+def allowed_cores():
+    """
+        Ядра, на которых разрешено выполняться текущему процессу.
+    """
+
+    if not hasattr(os, "sched_getaffinity"):
+        return []
+
+    return sorted(os.sched_getaffinity(0))
+
+
+def dedicated_cores(count):
+    """
+        Раздельные ядра для count процессов замеров и общие ядра для остальной работы.
+        Первые Timing.shared_cores ядер остаются общими; если ядер не хватает,
+        выделенные ядра не назначаются (None), и все процессы делят все ядра.
+    """
+
+    cores = allowed_cores()
+
+    if len(cores) < count + Timing.shared_cores:
+        return [None] * count, set(cores)
+
+    return [{core} for core in cores[len(cores) - count:]], set(cores[:len(cores) - count])
+
+
+def pin_cpu(cores):
+    """
+        Закрепление текущего процесса за множеством ядер.
+        Возвращает True, если закрепление выполнено.
+    """
+
+    if not cores or not hasattr(os, "sched_setaffinity"):
+        return False
+
+    os.sched_setaffinity(0, cores)
+
+    return True
+
+
+@contextmanager
+def pinned(cores):
+    """
+        Закрепление текущего процесса за ядрами cores на время блока
+        с восстановлением прежнего набора ядер.
+    """
+
+    previous = set(allowed_cores())
+
+    try:
+        yield pin_cpu(cores)
+    finally:
+        pin_cpu(previous)
+
+
+@lru_cache(maxsize=None)
+def harness():
+    """
+        Нативная обвязка для замеров функций игроков.
+        Обвязка собирается при сборке образа, без неё игры на время не запускаются.
+    """
+
+    try:
+        lib = ctypes.CDLL(Timing.harness)
+    except OSError as error:
+        raise OSError(
+            f"{Timing.harness} NOT LOADED ({error}). "
+            "IT IS BUILT INTO THE IMAGE FROM games/utils/bench_harness.c, "
+            "REBUILD THE IMAGE") from error
+
+    lib.bench_counters_read.restype = ctypes.c_longlong
+
+    return lib
+
+
+@lru_cache(maxsize=None)
+def counters_enabled():
+    """
+        Доступны ли аппаратные счётчики: включены в Timing.hardware_counters,
+        обвязка загружается и perf_event_open разрешён.
+    """
+
+    if not Timing.hardware_counters:
+        return False
+
+    try:
+        return harness().bench_counters_open() == 0
+    except OSError:
+        return False
+
+
+class CounterTotals:
+    """
+        Суммы аппаратных событий по замерам одного источника.
+    """
+
+    def __init__(self):
+        self.values = [0.0] * len(Timing.counter_names)
+        self.calls = 0
+
+    def count(self, series, loops, count):
+        """
+            Вызов series(loops, count) с подсчётом событий вокруг замеряемых вызовов.
+        """
+
+        harness().bench_counters_reset()
+        durations = series(loops, count)
+
+        values = (ctypes.c_double * len(Timing.counter_names))()
+        self.calls += harness().bench_counters_read(values)
+        self.values = [total + value for total, value in zip(self.values, values)]
+
+        return durations
+
+    def per_call(self):
+        """
+            Среднее число событий на вызов или None, если события не считались.
+        """
+
+        if not self.calls:
+            return None
+
+        return {name: value / self.calls
+                for name, value in zip(Timing.counter_names, self.values)}
+
+
+def native_series(bench_name, *args):
+    """
+        Источник замеров из bench_harness.so: функция обвязки bench_name
+        с аргументами (*args, samples, count, loops) записывает длительности
+        count серий в буфер samples.
+    """
+
+    bench = getattr(harness(), bench_name)
+
+    def series(loops, count):
+        samples = (ctypes.c_longlong * count)()
+        error = bench(*args, samples, ctypes.c_int(count), ctypes.c_int(loops))
+
+        if error:
+            raise OSError(f"{Timing.harness}: {bench.__name__} FAILED WITH CODE {error}")
+
+        return list(samples)
+
+    return series
+
+
+def calibrate(series, min_sample_ns=Timing.min_sample_ns):
+    """
+        Подбор числа вызовов в серии, при котором серия длится
+        не меньше min_sample_ns.
+    """
+
+    loops = 1
+
+    while loops < Timing.max_loops:
+        elapsed = series(loops, 1)[0]
+
+        if elapsed >= min_sample_ns:
+            break
+
+        if elapsed > 0:
+            loops = ceil(loops * min_sample_ns * 1.1 / elapsed)
+        else:
+            loops *= 10
+
+    return min(loops, Timing.max_loops)
+
+
+def median_abs_deviation(samples, center):
+    """
+        Медианное абсолютное отклонение от center.
+    """
+
+    return median(abs(sample - center) for sample in samples)
+
+
+def median_ci(samples):
+    """
+        Доверительный интервал медианы по порядковым статистикам,
+        без предположений о распределении. Используется для остановки замеров.
+    """
+
+    ordered = sorted(samples)
+    count = len(ordered)
+    half_width = Timing.z_score * sqrt(count) / 2
+
+    low = max(0, int(count / 2 - half_width))
+    high = min(count - 1, int(ceil(count / 2 + half_width)))
+
+    return ordered[low], ordered[high]
+
+
+def bootstrap_ci(samples, resamples=Timing.bootstrap_resamples,
+                 confidence=Timing.confidence):
+    """
+        Бутстрэп-интервал медианы (перцентильный метод).
+        Генератор с фиксированным сидом: один и тот же набор замеров
+        всегда даёт один и тот же интервал.
+    """
+
+    rng = Random(Timing.bootstrap_seed)
+    count = len(samples)
+
+    medians = sorted(
+        median(rng.choices(samples, k=count)) for _ in range(resamples)
+    )
+
+    tail = (1 - confidence) / 2
+
+    return medians[int(tail * (resamples - 1))], medians[int(ceil((1 - tail) * (resamples - 1)))]
+
+
+def converged(samples):
+    """
+        Достаточно ли узок доверительный интервал медианы.
+    """
+
+    low, high = median_ci(samples)
+    center = median(samples)
+
+    return center > 0 and (high - low) / center <= Timing.rel_ci_width
+
+
+def summarize(samples, loops, counters=None):
+    """
+        Итог замеров: медиана, MAD, бутстрэп-интервал медианы
+        и аппаратные события на вызов.
+    """
+
+    center = median(samples)
+    ci_low, ci_high = bootstrap_ci(samples)
+
+    return Measurement(center, median_abs_deviation(samples, center),
+                       ci_low, ci_high, len(samples), loops, counters)
+
+
+def measure_interleaved(sources, loops=None):
+    """
+        Замеры нескольких источников до сходимости каждого.
+
+        Каждый источник калибруется (если loops не задан) и прогревается,
+        затем источники получают по пачке замеров за раунд, причём порядок
+        обхода меняется от раунда к раунду на обратный. Сошедшиеся источники
+        выбывают из раундов. Аппаратные события, если они доступны, считаются
+        только на пачках, вошедших в замеры. Возвращает замеры в порядке sources.
+    """
+
+    if loops is None:
+        loops = [calibrate(series) for series in sources]
+
+    for series, count in zip(sources, loops):
+        series(count, Timing.warmup_series)
+
+    samples = [[] for _ in sources]
+    totals = [CounterTotals() for _ in sources]
+    counting = counters_enabled()
+    active = list(range(len(sources)))
+    forward = True
+
+    while active:
+        for ind in active if forward else reversed(active):
+            batch = Timing.batch_samples if samples[ind] else Timing.min_samples
+            batch = min(batch, Timing.max_samples - len(samples[ind]))
+
+            if counting:
+                durations = totals[ind].count(sources[ind], loops[ind], batch)
+            else:
+                durations = sources[ind](loops[ind], batch)
+
+            samples[ind].extend(duration / loops[ind] for duration in durations)
+
+        active = [ind for ind in active
+                  if len(samples[ind]) < Timing.max_samples and not converged(samples[ind])]
+        forward = not forward
+
+    return [summarize(*args, total.per_call())
+            for *args, total in zip(samples, loops, totals)]
+
+
+def measure_players(sources, names):
+    """
+        Замеры стратегий нескольких игроков вперемешку.
+        sources - номер игрока -> источник замеров, names - пути к библиотекам.
+        Печатает замеры и отчёт о шуме, возвращает номер игрока -> замер.
+    """
+
+    measurements = dict(zip(sources, measure_interleaved(list(sources.values()))))
+
+    for ind, measurement in measurements.items():
+        print(f"{names[ind]}: ", end="")
+        print_measurement(measurement)
+
+    print_noise_report(measurements.values())
+
+    return measurements
+
+
+def print_measurement(measurement):
+    """
+        Печать результатов замеров.
+    """
+
+    print(
+        f"MEDIAN: {measurement.median:.1f}ns "
+        f"MAD: {measurement.mad:.1f}ns "
+        f"CI{int(Timing.confidence * 100)}: "
+        f"[{measurement.ci_low:.1f}, {measurement.ci_high:.1f}]ns "
+        f"SAMPLES: {measurement.samples} LOOPS: {measurement.loops}"
+    )
+
+    if measurement.counters:
+        print(" ".join(f"{name.upper()}: {value:.1f}"
+                       for name, value in measurement.counters.items()))
+
+
+def print_noise_report(measurements):
+    """
+        Отчёт о шуме замеров запуска: ядра процесса, относительный MAD
+        и относительная ширина доверительного интервала по игрокам.
+    """
+
+    measurements = list(measurements)
+    cores = allowed_cores()
+
+    print(f"NOISE REPORT: CORES {','.join(map(str, cores)) or 'UNKNOWN'}", end="")
+
+    if not measurements:
+        print()
+        return
+
+    rel_mads = [measurement.rel_mad for measurement in measurements]
+    rel_widths = [measurement.rel_ci_width for measurement in measurements]
+
+    print(
+        f" REL MAD: median {median(rel_mads):.2%} max {max(rel_mads):.2%}"
+        f" REL CI WIDTH: median {median(rel_widths):.2%} max {max(rel_widths):.2%}"
+        f" AT SAMPLE LIMIT: "
+        f"{sum(measurement.samples >= Timing.max_samples for measurement in measurements)}"
+    )
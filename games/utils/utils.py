@@ -10,8 +10,8 @@ import sys
 import os
 import subprocess
 import logging
+import hashlib
 from dataclasses import dataclass
-from statistics import median, pvariance
 from functools import reduce
 from multiprocessing import Process, Value
 from psutil import virtual_memory
@@ -40,6 +40,14 @@ class Error:
     memory_leak_check_error = -3
 
 
+@dataclass
+class Stdout:
+    """
+        Состояние вывода стратегий игроков
+    """
+    redirected = False
+
+
 @dataclass
 class Constants:
     """
@@ -155,8 +163,15 @@ def memory_leak_check(sample_path, lib_path, sample_args):
 def redirect_ctypes_stdout():
     """
         Выключение принтов в стратегиях игроков.
+        Повторный вызов ничего не делает, иначе вывод самого ранера
+        тоже ушёл бы в /dev/null.
     """
 
+    if Stdout.redirected:
+        return
+
+    Stdout.redirected = True
+
     new_stdout = os.dup(1)
     sys.stdout.flush()
     devnull = os.open(os.devnull, os.O_WRONLY)
@@ -165,12 +180,18 @@ def redirect_ctypes_stdout():
     sys.stdout = os.fdopen(new_stdout, 'w')
 
 
-def process_time(time_results):
+def lib_hash(lib_path, chunk_size=1 << 16):
     """
-        Обработка результатов (по времени) игрока. Подсчёт медианы и дисперсии.
+        Подсчёт SHA-256 библиотеки игрока.
     """
 
-    return median(time_results), pvariance(time_results)
+    sha = hashlib.sha256()
+
+    with open(lib_path, "rb") as lib:
+        for chunk in iter(lambda: lib.read(chunk_size), b""):
+            sha.update(chunk)
+
+    return sha.hexdigest()
 
 
 def parsing_name(lib_path):
@@ -218,18 +239,6 @@ def print_score_results(points, players_info, players_amount):
             )
 
 
-def print_strgame_results(game, incorrect_test, total_time, dispersion):
-    """
-        Печать результатов для STRGAME.
-    """
-
-    print(
-        f"{game} TESTS: {'FAIL' if incorrect_test else 'OK'} "
-        f"TIME: {total_time} "
-        f"DISPERSION: {dispersion}"
-    )
-
-
 def print_time_results(results, players_info):
     """
         Печать финальных результатов для каждого игрока.
@@ -257,14 +266,13 @@ def concat_strings(f_obj):
 def strgame_runner(tests_path, tests_runner):
     """
         Универсальная функция, производящая запуск STR игр (split, strtok)
+        на тестовой строке из tests_path для всех игроков сразу.
     """
 
     with open(tests_path + Constants.test_file, "r") as f_obj:
         test_data = concat_strings(f_obj)
 
-    time, error_code, dispersion = tests_runner(test_data)
-
-    return error_code, time, dispersion
+    return tests_runner(test_data)
 
 
 def calculate_coefficient(pts):
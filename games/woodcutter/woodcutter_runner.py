@@ -26,9 +26,11 @@
 """
 
 import ctypes
-from random import randint, choice
+from random import Random
 from dataclasses import dataclass
 import games.utils.utils as utils
+import games.utils.rating as rating
+import games.utils.pairs as pairs
 
 
 @dataclass
@@ -48,31 +50,22 @@ class Woodcutter:
 
     spaces = 30
 
+    seed = 2020
+
     sample_path = utils.Constants.sample_path + "/woodcutter.c"
 
 
-def scoring(points, player1_index, player2_index, round_info):
+def round_outcome(player1_index, player2_index, round_info):
     """
-        Запись и подсчет очков в результирующий массив points.
+        Формирование исхода раунда для пакетного подсчёта рейтинга Эло.
     """
 
     if round_info == Woodcutter.player_one_win:
-        player1_result = 1
-        player2_result = 0
+        player1_result = rating.RoundResult.win
     else:
-        player1_result = 0
-        player2_result = 1
-
-    pts1 = points[player1_index]
-    pts2 = points[player2_index]
-    points[player1_index] = int(
-        utils.calculate_elo_rating(pts1, pts2, player1_result))
-    points[player2_index] = int(
-        utils.calculate_elo_rating(pts2, pts1, player2_result))
-
-    return points
-
+        player1_result = rating.RoundResult.loss
 
+    return rating.make_outcome(player1_index, player2_index, player1_result)
 
 
 def print_tree(tree, size, player_name):
@@ -311,19 +304,20 @@ def get_node(position, size):
     return row - 1, position - count_prev + row
 
 
-def fill_tree(tree, size):
+def fill_tree(tree, size, rng):
     """
-        Заполнение матрицы смежности, описывающей дерево.
+        Заполнение матрицы смежности, описывающей дерево,
+        случайными рёбрами и корнями из генератора rng.
     """
 
     max_border = (size - 1) * size - 1 - size * (size + 1) // 2
-    count_edges = randint(size // 2, max_border)
-    count_roots = randint(1, size // 2)
+    count_edges = rng.randint(size // 2, max_border)
+    count_roots = rng.randint(1, size // 2)
 
     positions = list(range(max_border))
 
     for i in range(count_edges):
-        position = choice(positions)
+        position = rng.choice(positions)
         positions.remove(position)
 
         row, column = get_node(position, size)
@@ -333,7 +327,7 @@ def fill_tree(tree, size):
     positions = list(range(size))
 
     for i in range(count_roots):
-        rote = choice(positions)
+        rote = rng.choice(positions)
         positions.remove(rote)
         tree[rote][rote] = Woodcutter.connected
 
@@ -356,54 +350,85 @@ def create_tree(count_nodes):
     return matrix_pointer
 
 
-def start_woodcutter_game(players_info):
+def create_pair_trees(player1_hash, player2_hash):
+    """
+        Создание дерева для пары игроков и его копии.
+        Дерево определяется сидом турнира и библиотеками пары,
+        поэтому при повторном турнире пара играет на том же дереве.
+        Генератор дерева свой для пары и не меняет состояние модуля random.
+    """
+
+    rng = Random(f"{Woodcutter.seed}:{min(player1_hash, player2_hash)}:"
+                 f"{max(player1_hash, player2_hash)}")
+
+    count_nodes = rng.randint(Woodcutter.min_count_nodes,
+                              Woodcutter.max_count_nodes)
+
+    tree = create_tree(count_nodes)
+    tree_copy = create_tree(count_nodes)
+
+    fill_tree(tree, count_nodes, rng)
+    copy_tree(tree, tree_copy, count_nodes)
+
+    return tree, tree_copy, count_nodes
+
+
+def start_woodcutter_game(players_info, pairs_dump=None):
     """
         Функция запускает каждую стратегию с каждой.
+        Рейтинг Эло считается один раз по исходам всех раундов.
+        Если указан pairs_dump, раунды между неизменившимися
+        стратегиями не разыгрываются, а берутся из прошлого турнира.
     """
 
     utils.redirect_ctypes_stdout()
 
     points = [players_info[i][1] for i in range(len(players_info))]
+    outcomes = []
+    no_results = set()
+
+    hashes = [utils.lib_hash(info[0]) if info[0] != "NULL" else None
+              for info in players_info]
+    stored = pairs.load_pairs(pairs_dump)
+    played = {}
 
     for i in range(len(players_info) - 1):
         if players_info[i][0] != "NULL":
-            player_lib = ctypes.CDLL(players_info[i][0])
-
             for j in range(i + 1, len(players_info)):
                 if players_info[j][0] != "NULL":
-                    rival_lib = ctypes.CDLL(players_info[j][0])
-
-                    count_nodes = randint(Woodcutter.min_count_nodes,
-                                          Woodcutter.max_count_nodes)
-
-                    tree = create_tree(count_nodes)
-                    tree_copy = create_tree(count_nodes)
-
-                    fill_tree(tree, count_nodes)
-                    copy_tree(tree, tree_copy, count_nodes)
-
-                    round_info = woodcutter_round(
-                        player_lib,
-                        rival_lib,
-                        tree,
-                        count_nodes,
-                        (players_info[i][0], players_info[j][0])
-                    )
-                    points = scoring(points, i, j, round_info)
-
-                    round_info = woodcutter_round(
-                        rival_lib,
-                        player_lib,
-                        tree_copy,
-                        count_nodes,
-                        (players_info[j][0], players_info[i][0])
-                    )
-                    points = scoring(points, j, i, round_info)
+                    trees = create_pair_trees(hashes[i], hashes[j])
+                    count_nodes = trees[2]
+
+                    for first, second, tree in ((i, j, trees[0]), (j, i, trees[1])):
+                        names = (players_info[first][0], players_info[second][0])
+
+                        round_info = pairs.play_round(
+                            stored,
+                            played,
+                            pairs.pair_key(hashes[first], hashes[second],
+                                           count_nodes, Woodcutter.seed),
+                            lambda names=names, tree=tree, size=count_nodes: woodcutter_round(
+                                ctypes.CDLL(names[0]),
+                                ctypes.CDLL(names[1]),
+                                tree,
+                                size,
+                                names
+                            )
+                        )
+                        outcomes.append(round_outcome(first, second, round_info))
 
                 else:
-                    points[j] = utils.GameResult.no_result
+                    no_results.add(j)
         else:
-            points[i] = utils.GameResult.no_result
+            no_results.add(i)
+
+    pairs.print_reused(stored, played)
+    pairs.save_pairs(pairs_dump, played)
+
+    points = rating.batch_elo_rating(points, outcomes)
+
+    for i in no_results:
+        points[i] = utils.GameResult.no_result
 
     utils.print_score_results(points, players_info, len(players_info))
 
@@ -20,6 +20,8 @@
 
 import ctypes
 import games.utils.utils as utils
+import games.utils.rating as rating
+import games.utils.pairs as pairs
 
 DRAW = 0
 PLAYER_ONE_WIN = 1
@@ -192,71 +194,74 @@ def xogame_round(player1_lib, player2_lib, field_size, players_names):
             return PLAYER_TWO_WIN
 
 
-def scoring(points, player1_index, player2_index, round_info):
+def round_outcome(player1_index, player2_index, round_info):
     """
-        Запись и подсчёт очков в результирующий массив points.
-        Система подсчёта очков по рейтинговой системе Эло.
+        Формирование исхода раунда для пакетного подсчёта рейтинга Эло.
     """
 
     if round_info == DRAW:
-        player1_round_result = 0.5
-        player2_round_result = 0.5
+        player1_round_result = rating.RoundResult.draw
     elif round_info == PLAYER_ONE_WIN:
-        player1_round_result = 1
-        player2_round_result = 0
+        player1_round_result = rating.RoundResult.win
     else:
-        player1_round_result = 0
-        player2_round_result = 1
+        player1_round_result = rating.RoundResult.loss
 
-    pts1 = points[player1_index]
-    pts2 = points[player2_index]
-    points[player1_index] = int(
-        utils.calculate_elo_rating(pts1, pts2, player1_round_result))
-    points[player2_index] = int(
-        utils.calculate_elo_rating(pts2, pts1, player2_round_result))
-
-    return points
+    return rating.make_outcome(player1_index, player2_index, player1_round_result)
 
 
-def start_xogame_competition(players_info, field_size):
+def start_xogame_competition(players_info, field_size, pairs_dump=None):
     """
         Функция запускает каждую стратегию с каждой,
-        результаты для каждого игрока записываются в массив points.
+        исходы всех раундов собираются в массив outcomes,
+        по которому рейтинг Эло считается один раз в конце турнира.
+        Если указан pairs_dump, раунды между неизменившимися
+        стратегиями не разыгрываются, а берутся из прошлого турнира.
     """
 
     if field_size == 3:
         utils.redirect_ctypes_stdout()
 
     points = [players_info[i][1] for i in range(len(players_info))]
+    outcomes = []
+    no_results = set()
+
+    hashes = [utils.lib_hash(info[0]) if info[0] != "NULL" else None
+              for info in players_info]
+    stored = pairs.load_pairs(pairs_dump)
+    played = {}
 
     for i in range(len(players_info) - 1):
         if players_info[i][0] != "NULL":
-            player_lib = ctypes.CDLL(players_info[i][0])
-
             for j in range(i + 1, len(players_info)):
                 if players_info[j][0] != "NULL":
-                    opponent_lib = ctypes.CDLL(players_info[j][0])
-
-                    round_info = xogame_round(
-                        player_lib,
-                        opponent_lib,
-                        field_size,
-                        (players_info[i][0], players_info[j][0])
-                    )
-                    points = scoring(points, i, j, round_info)
-
-                    round_info = xogame_round(
-                        opponent_lib,
-                        player_lib,
-                        field_size,
-                        (players_info[j][0], players_info[i][0])
-                    )
-                    points = scoring(points, j, i, round_info)
+                    for first, second in ((i, j), (j, i)):
+                        names = (players_info[first][0], players_info[second][0])
+
+                        round_info = pairs.play_round(
+                            stored,
+                            played,
+                            pairs.pair_key(hashes[first], hashes[second], field_size),
+                            lambda names=names: xogame_round(
+                                ctypes.CDLL(names[0]),
+                                ctypes.CDLL(names[1]),
+                                field_size,
+                                names
+                            )
+                        )
+                        outcomes.append(round_outcome(first, second, round_info))
 
                 else:
-                    points[j] = utils.GameResult.no_result
+                    no_results.add(j)
         else:
-            points[i] = utils.GameResult.no_result
+            no_results.add(i)
+
+    pairs.print_reused(stored, played)
+    pairs.save_pairs(pairs_dump, played)
+
+    points = rating.batch_elo_rating(points, outcomes)
+
+    for i in no_results:
+        points[i] = utils.GameResult.no_result
 
     utils.print_score_results(points, players_info, len(players_info))
 
@@ -0,0 +1,63 @@
+"""
+    Проверки буфера архива артефактов.
+"""
+
+
+import io
+import zipfile
+import unittest
+
+from worker.artifacts import SpooledBuffer
+
+
+def make_archive(files):
+    """
+        Zip-архив с файлами имя -> содержимое.
+    """
+
+    archive = io.BytesIO()
+
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for name, data in files.items():
+            zip_file.writestr(name, data)
+
+    return archive.getvalue()
+
+
+class SpooledBufferTest(unittest.TestCase):
+    """
+        Чтение архива из буфера в памяти и из буфера, ушедшего во временный файл.
+    """
+
+    files = {"player_num63rs_lib.so": b"\x7fELF" + bytes(range(256)) * 64,
+             "report.txt": b"ok"}
+
+    def read_back(self, max_size):
+        """
+            Запись архива в буфер и чтение всех файлов обратно через zipfile.
+        """
+
+        with SpooledBuffer(max_size=max_size) as buffer:
+            buffer.write(make_archive(self.files))
+            buffer.seek(0)
+
+            with zipfile.ZipFile(buffer) as archive:
+                return {name: archive.open(name).read() for name in archive.namelist()}
+
+    def test_in_memory(self):
+        """
+            Архив меньше max_size остаётся в памяти.
+        """
+
+        self.assertEqual(self.read_back(1 << 20), self.files)
+
+    def test_rolled_over(self):
+        """
+            Архив больше max_size уходит во временный файл.
+        """
+
+        self.assertEqual(self.read_back(16), self.files)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+"""
+    Проверки кэша метаданных GitLab поверх заглушки транспорта.
+"""
+
+
+import io
+import os
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+import gitlab
+import requests
+from requests.adapters import HTTPAdapter
+
+from worker.cache import CachingAdapter, MetadataCache, cache_key, install_cache
+
+
+URL = "http://gitlab.local/api/v4/projects/1"
+BODY = {"id": 1, "name": "project"}
+ETAG = '"etag-1"'
+
+
+def response(status, headers=None, body=b""):
+    """
+        Ответ заглушки транспорта.
+    """
+
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers.update(headers or {})
+    resp.raw = io.BytesIO(body)
+    resp.url = URL
+    resp.connection = None
+
+    return resp
+
+
+def json_response():
+    """
+        Ответ 200 с JSON-телом и ETag.
+    """
+
+    return response(200, {"Content-Type": "application/json", "ETag": ETAG},
+                    json.dumps(BODY).encode())
+
+
+def request(method):
+    """
+        Подготовленный запрос к API.
+    """
+
+    return requests.Request(method, URL, headers={"PRIVATE-TOKEN": "token"}).prepare()
+
+
+class StubTransport:
+    """
+        Заглушка HTTPAdapter.send: отвечает ответами по очереди
+        и запоминает заголовки отправленных запросов.
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.headers = []
+
+    def __call__(self, sent_request, **kwargs):
+        self.headers.append(dict(sent_request.headers))
+        return self.responses.pop(0)
+
+
+class CachingAdapterTest(unittest.TestCase):
+    """
+        Условные запросы и обход кэша в CachingAdapter.
+    """
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+
+        self.cache = MetadataCache(os.path.join(tmp_dir.name, "metadata.sqlite"))
+        self.addCleanup(self.cache.close)
+
+    def send(self, transport, method, stream=False):
+        """
+            Отправка запроса через CachingAdapter поверх заглушки транспорта.
+        """
+
+        with mock.patch.object(HTTPAdapter, "send", side_effect=transport):
+            return CachingAdapter(self.cache).send(request(method), stream=stream)
+
+    def test_not_modified(self):
+        """
+            Повторный GET отправляется с If-None-Match,
+            и на 304 возвращается сохранённое тело.
+        """
+
+        transport = StubTransport(json_response(), response(304))
+
+        first = self.send(transport, "GET")
+        second = self.send(transport, "GET")
+
+        self.assertNotIn("If-None-Match", transport.headers[0])
+        self.assertEqual(transport.headers[1]["If-None-Match"], ETAG)
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+        self.assertEqual(second.json(), BODY)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_post_bypass(self):
+        """
+            Не-GET запросы не кэшируются и уходят без условных заголовков.
+        """
+
+        transport = StubTransport(json_response(), json_response())
+
+        self.send(transport, "POST")
+        self.send(transport, "POST")
+
+        self.assertNotIn("If-None-Match", transport.headers[1])
+        self.assertIsNone(self.cache.get(cache_key(request("POST"))))
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 0))
+
+    def test_stream_bypass(self):
+        """
+            Потоковые GET-запросы (архивы артефактов) через кэш не проходят.
+        """
+
+        transport = StubTransport(json_response(), json_response())
+
+        self.send(transport, "GET", stream=True)
+        self.send(transport, "GET", stream=True)
+
+        self.assertNotIn("If-None-Match", transport.headers[1])
+        self.assertIsNone(self.cache.get(cache_key(request("GET"))))
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 0))
+
+
+class InstallCacheTest(unittest.TestCase):
+    """
+        Кэш, подключенный к экземпляру GitLab.
+    """
+
+    def test_not_modified(self):
+        """
+            Запросы python-gitlab проходят через кэш: на 304 возвращается
+            сохранённый JSON, повторное подключение отдаёт тот же кэш.
+        """
+
+        instance = gitlab.Gitlab("http://gitlab.local", private_token="token")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = install_cache(instance, os.path.join(tmp_dir, "metadata.sqlite"))
+            self.addCleanup(cache.close)
+
+            transport = StubTransport(json_response(), response(304))
+
+            with mock.patch.object(HTTPAdapter, "send", side_effect=transport):
+                first = instance.http_get("/projects/1")
+                second = instance.http_get("/projects/1")
+
+            self.assertIs(install_cache(instance), cache)
+
+        self.assertEqual(first, BODY)
+        self.assertEqual(second, BODY)
+        self.assertEqual(transport.headers[1]["If-None-Match"], ETAG)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+    Проверки повторов запросов транспорта GitLab.
+"""
+
+
+import io
+import unittest
+from unittest import mock
+from email.utils import format_datetime
+from datetime import datetime, timezone
+
+import gitlab
+import requests
+from requests.adapters import HTTPAdapter
+
+from worker.client import Client, RetryingAdapter, configure_client
+
+
+URL = "http://gitlab.local/api/v4/projects/1"
+
+
+def response(status, headers=None):
+    """
+        Ответ заглушки транспорта.
+    """
+
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers.update(headers or {})
+    resp.raw = io.BytesIO(b"{}")
+    resp.url = URL
+
+    return resp
+
+
+def request(method):
+    """
+        Подготовленный запрос к API.
+    """
+
+    return requests.Request(method, URL).prepare()
+
+
+class RetryingAdapterTest(unittest.TestCase):
+    """
+        Повторы RetryingAdapter поверх заглушки HTTPAdapter.send.
+    """
+
+    def send(self, method, *responses):
+        """
+            Отправка запроса через адаптер: заглушка отвечает ответами responses
+            по очереди. Возвращает (ответ, число отправок, задержки перед повторами).
+        """
+
+        with mock.patch.object(HTTPAdapter, "send", side_effect=list(responses)) as send, \
+                mock.patch("worker.client.time.sleep") as sleep:
+            result = RetryingAdapter().send(request(method))
+
+        return result, send.call_count, [call.args[0] for call in sleep.call_args_list]
+
+    def test_transient_get_retried(self):
+        """
+            Идемпотентный запрос повторяется после 5xx.
+        """
+
+        result, sent, _ = self.send("GET", response(503), response(200))
+
+        self.assertEqual((result.status_code, sent), (200, 2))
+
+    def test_post_not_retried_on_5xx(self):
+        """
+            Неидемпотентный запрос после 5xx не повторяется.
+        """
+
+        result, sent, _ = self.send("POST", response(502), response(200))
+
+        self.assertEqual((result.status_code, sent), (502, 1))
+
+    def test_post_retried_on_429(self):
+        """
+            Неидемпотентный запрос повторяется при ограничении частоты
+            через Retry-After секунд.
+        """
+
+        result, sent, delays = self.send(
+            "POST", response(429, {"Retry-After": "3"}), response(201))
+
+        self.assertEqual((result.status_code, sent, delays), (201, 2, [3.0]))
+
+    def test_retry_after_date(self):
+        """
+            Retry-After в виде даты HTTP.
+        """
+
+        now = datetime(2020, 10, 1, 12, 0, 0, tzinfo=timezone.utc)
+        header = format_datetime(now.replace(second=7), usegmt=True)
+
+        with mock.patch("worker.client.time.time", return_value=now.timestamp()):
+            _, _, delays = self.send("GET", response(429, {"Retry-After": header}),
+                                     response(200))
+
+        self.assertEqual(delays, [7.0])
+
+    def test_ratelimit_reset(self):
+        """
+            Без Retry-After задержка считается до RateLimit-Reset.
+        """
+
+        with mock.patch("worker.client.time.time", return_value=1000.0):
+            _, _, delays = self.send("GET", response(429, {"RateLimit-Reset": "1012"}),
+                                     response(200))
+
+        self.assertEqual(delays, [12.0])
+
+    def test_gives_up(self):
+        """
+            После Client.retries повторов возвращается последний ответ.
+        """
+
+        responses = [response(503) for _ in range(Client.retries + 2)]
+        result, sent, _ = self.send("GET", *responses)
+
+        self.assertEqual((result.status_code, sent), (503, Client.retries + 1))
+
+
+class ConfigureClientTest(unittest.TestCase):
+    """
+        Повторы python-gitlab поверх настроенного транспорта.
+    """
+
+    def test_no_library_retries(self):
+        """
+            429 повторяет только транспорт: python-gitlab не запускает
+            вокруг него собственный цикл повторов.
+        """
+
+        instance = gitlab.Gitlab("http://gitlab.local", private_token="token")
+        configure_client(instance)
+
+        responses = [response(429, {"Retry-After": "0"}) for _ in range(3 * Client.retries)]
+
+        with mock.patch.object(HTTPAdapter, "send", side_effect=responses) as send, \
+                mock.patch("worker.client.time.sleep"), mock.patch("gitlab.time.sleep"):
+            with self.assertRaises(gitlab.exceptions.GitlabHttpError):
+                instance.http_get("/projects/1")
+
+        self.assertEqual(send.call_count, Client.retries + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+    Проверки хранилища исходов раундов парных игр.
+"""
+
+
+import os
+import tempfile
+import unittest
+
+import games.utils.pairs as pairs
+
+
+class PairsDumpTest(unittest.TestCase):
+    """
+        Запись исходов раундов в JSON и чтение обратно.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dump = os.path.join(self.tmp.name, "pairdump_xogame_3x3.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        """
+            Ключи-кортежи и исходы восстанавливаются без изменений.
+        """
+
+        played = {pairs.pair_key("a" * 64, "b" * 64, 3): 1,
+                  pairs.pair_key("b" * 64, "a" * 64, 11, 2020): 0}
+
+        pairs.save_pairs(self.dump, played)
+
+        self.assertEqual(pairs.load_pairs(self.dump), played)
+
+    def test_damaged_dump(self):
+        """
+            Испорченный файл не прерывает турнир: все раунды разыгрываются заново.
+        """
+
+        with open(self.dump, "wb") as dump:
+            dump.write(b"\x80\x04\x95 not json")
+
+        self.assertEqual(pairs.load_pairs(self.dump), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
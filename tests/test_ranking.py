@@ -0,0 +1,165 @@
+"""
+    Проверки порядка таблиц и сдвигов мест.
+"""
+
+
+import random
+import operator
+import unittest
+from functools import cmp_to_key
+
+from worker.interval import TimeInterval
+from worker.ranking import rank_diff, timedep_sort
+
+
+STATUS_COL, RES_COL, TIME_COL = 0, 1, 2
+
+
+def dispcmp(frec, srec):
+    """
+        Компаратор, которым таблицы сортировались раньше.
+    """
+
+    if frec[RES_COL] < srec[RES_COL]:
+        return 1
+    if frec[RES_COL] > srec[RES_COL]:
+        return -1
+    if frec[RES_COL].overlaps(srec[RES_COL]):
+        if frec[TIME_COL] < srec[TIME_COL]:
+            return 1
+        return -1
+
+    return 1
+
+
+def comparator_sort(results):
+    """
+        Прежний порядок: компаратор, затем устойчивая сортировка по статусу.
+    """
+
+    results = sorted(results, key=cmp_to_key(dispcmp), reverse=True)
+
+    return sorted(results, key=operator.itemgetter(STATUS_COL))
+
+
+def consistent(results):
+    """
+        Согласован ли порядок с компаратором для каждой пары строк одного статуса.
+    """
+
+    return all(dispcmp(frec, srec) == 1
+               for ind, frec in enumerate(results) for srec in results[ind + 1:]
+               if frec[STATUS_COL] == srec[STATUS_COL])
+
+
+def random_table(rand, size):
+    """
+        Таблица из size строк с разными временами сборки.
+    """
+
+    times = rand.sample(range(10 * size), size)
+    table = []
+
+    for time in times:
+        lower = rand.uniform(0, 100)
+        table.append((rand.choice("OF"), TimeInterval(lower, lower + rand.uniform(0, 15)), time))
+
+    return table
+
+
+class TimedepSortTest(unittest.TestCase):
+    """
+        Сравнение timedep_sort с прежним компаратором.
+    """
+
+    def test_disjoint_by_position(self):
+        """
+            Интервал, целиком лежащий ниже другого, выше в таблице
+            даже при нетранзитивных пересечениях.
+        """
+
+        table = [("O", TimeInterval(0, 2), 3),
+                 ("O", TimeInterval(1.5, 5), 2),
+                 ("O", TimeInterval(4.5, 6), 1)]
+
+        order = [rec[TIME_COL] for rec in timedep_sort(table, STATUS_COL, RES_COL, TIME_COL)]
+
+        self.assertLess(order.index(3), order.index(1))
+        self.assertLess(order.index(2), order.index(3))
+
+    def test_random_tables(self):
+        """
+            Там, где компаратор задаёт согласованный порядок, порядки совпадают;
+            в остальных таблицах отрезки, не пересекающиеся друг с другом,
+            упорядочены по положению.
+        """
+
+        rand = random.Random(2020)
+        compared = 0
+
+        for _ in range(3000):
+            table = random_table(rand, rand.randint(1, 40))
+            result = timedep_sort(table, STATUS_COL, RES_COL, TIME_COL)
+
+            self.assertEqual(sorted(result, key=id), sorted(table, key=id))
+
+            for ind, frec in enumerate(result):
+                for srec in result[ind + 1:]:
+                    if frec[STATUS_COL] == srec[STATUS_COL]:
+                        self.assertFalse(frec[RES_COL] > srec[RES_COL])
+                    else:
+                        self.assertLess(frec[STATUS_COL], srec[STATUS_COL])
+
+            expected = comparator_sort(table)
+            if consistent(expected):
+                compared += 1
+                self.assertEqual(result, expected)
+
+        self.assertGreater(compared, 1000)
+
+
+class RankDiffTest(unittest.TestCase):
+    """
+        Сдвиги мест между прошлой и новой таблицей.
+    """
+
+    def test_reorder(self):
+        """
+            Поднявшийся игрок получает положительный сдвиг, опустившийся - отрицательный.
+        """
+
+        shifts, dropped = rank_diff(["alice", "bob", "carol"], ["carol", "alice", "bob"])
+
+        self.assertEqual(shifts, [2, -1, -1])
+        self.assertEqual(dropped, {})
+
+    def test_insertion(self):
+        """
+            Новый игрок получает None, игроки под ним опускаются.
+        """
+
+        shifts, dropped = rank_diff(["alice", "bob"], ["alice", "dave", "bob"])
+
+        self.assertEqual(shifts, [0, None, -1])
+        self.assertEqual(dropped, {})
+
+    def test_removal(self):
+        """
+            Выбывший игрок попадает в выбывшие со старым местом, игроки под ним поднимаются.
+        """
+
+        shifts, dropped = rank_diff(["alice", "bob", "carol", "dave"], ["alice", "dave"])
+
+        self.assertEqual(shifts, [0, 2])
+        self.assertEqual(dropped, {"bob": 1, "carol": 2})
+
+    def test_empty_previous(self):
+        """
+            Без прошлой таблицы все игроки новые.
+        """
+
+        self.assertEqual(rank_diff([], ["alice", "bob"]), ([None, None], {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+    Проверки числа запросов к API при сборе артефактов группы.
+"""
+
+
+import io
+import re
+import json
+import zipfile
+import tempfile
+import unittest
+from unittest import mock
+
+import gitlab
+import requests
+
+import worker.repo as repo
+from worker.artifacts import ArtifactStore
+
+
+GROUP = "iu7-games"
+GAMES = ("NUM63RSgame", "STRgame")
+PROJECTS = 3
+
+
+def make_archive(files):
+    """
+        Zip-архив с файлами имя -> содержимое.
+    """
+
+    archive = io.BytesIO()
+
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        for name, data in files.items():
+            zip_file.writestr(name, data)
+
+    return archive.getvalue()
+
+
+def response(body, headers=None):
+    """
+        Ответ заглушки API: JSON-объект или байты.
+    """
+
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.headers.update(headers or {})
+
+    if isinstance(body, bytes):
+        resp.headers["Content-Type"] = "application/zip"
+        resp.raw = io.BytesIO(body)
+    else:
+        resp.headers["Content-Type"] = "application/json"
+        resp.raw = io.BytesIO(json.dumps(body).encode())
+
+    return resp
+
+
+class FakeGitLab:
+    """
+        Заглушка http_request: ответы по пути запроса и журнал запросов.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.blob_id = repo.master_blob_id("cfg/.gitlab-ci.students.yml")
+
+    def route(self, verb, path):
+        """
+            Ответ на запрос verb к path.
+        """
+
+        if re.search(r"/groups$", path):
+            return response([{"id": 7, "name": GROUP}])
+
+        if re.search(r"/groups/7/projects$", path):
+            return response([{"id": prj_id, "name": f"project_{prj_id}"}
+                             for prj_id in range(1, PROJECTS + 1)])
+
+        match = re.search(r"/projects/(\d+)/jobs$", path)
+        if match:
+            prj_id = int(match.group(1))
+            return response([{"id": prj_id * 100 + num, "ref": game, "name": "build",
+                              "finished_at": "2020-10-01T12:00:00.000Z"}
+                             for num, game in enumerate(GAMES)])
+
+        match = re.search(r"/projects/(\d+)/members$", path)
+        if match:
+            prj_id = int(match.group(1))
+            return response([{"id": prj_id, "username": f"user_{prj_id}",
+                              "name": f"User {prj_id}",
+                              "access_level": gitlab.DEVELOPER_ACCESS}])
+
+        if verb == "head" and "/repository/files/" in path:
+            return response(b"", {"X-Gitlab-Blob-Id": self.blob_id})
+
+        match = re.search(r"/jobs/(\d+)/artifacts$", path)
+        if match:
+            return response(make_archive({f"job_{match.group(1)}_lib.so": b"\x7fELF"}))
+
+        raise AssertionError(f"UNEXPECTED REQUEST {verb} {path}")
+
+    def __call__(self, verb, path, **kwargs):
+        self.requests.append((verb, path))
+        return self.route(verb, path)
+
+
+class CollectGroupTest(unittest.TestCase):
+    """
+        Запросы к API одного сбора артефактов группы.
+    """
+
+    def setUp(self):
+        repo.JOBS_CACHE.clear()
+        self.addCleanup(repo.JOBS_CACHE.clear)
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.store = ArtifactStore(tmp_dir.name)
+
+        self.instance = gitlab.Gitlab("http://gitlab.local", private_token="token")
+        self.fake = FakeGitLab()
+
+    def collect(self):
+        """
+            Один сбор артефактов группы через заглушку API.
+        """
+
+        with mock.patch.object(self.instance, "http_request", self.fake), \
+                mock.patch("builtins.print"):
+            return repo.collect_group(self.instance, GAMES, GROUP, self.store)
+
+    def test_api_calls(self):
+        results = self.collect()
+
+        # Группа и список её проектов, затем на проект: job'ы и участники,
+        # а на каждую ветку проекта: HEAD файла CI и архив артефактов.
+        expected = 2 + PROJECTS * (2 + 2 * len(GAMES))
+
+        self.assertEqual(len(self.fake.requests), expected)
+        self.assertEqual(self.instance.api_counter.calls, expected)
+        for game in GAMES:
+            self.assertEqual([rec[2] for rec in results[game]],
+                             [f"@user_{prj_id}" for prj_id in range(1, PROJECTS + 1)])
+
+    def test_projects_not_refetched(self):
+        self.collect()
+
+        project_gets = [path for verb, path in self.fake.requests
+                        if re.search(r"/projects/\d+$", path)]
+
+        self.assertEqual(project_gets, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,278 @@
+"""
+    Проверки хранилища результатов.
+"""
+
+
+import os
+import pickle
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from datetime import datetime
+
+from worker.agent import EVALUATION, previous_standings
+from worker.interval import TimeInterval
+from worker.store import ResultsStore, Store
+
+
+def record(player, score):
+    """
+        Строка таблицы результатов: место, имя, gitlab id, очки.
+    """
+
+    return [0, player, f"id_{player}", score]
+
+
+def tables(path):
+    """
+        Имена таблиц и индексов базы.
+    """
+
+    conn = sqlite3.connect(path)
+
+    try:
+        return {name for name, in conn.execute("SELECT name FROM sqlite_master")}
+    finally:
+        conn.close()
+
+
+class SchemaTest(unittest.TestCase):
+    """
+        Обновление схемы базы при открытии.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "results.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_old_version_migrated(self):
+        """
+            База старой версии получает недостающие индексы и новую версию.
+        """
+
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE runs (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                     "game TEXT NOT NULL, division TEXT NOT NULL, created_at TEXT NOT NULL)")
+        conn.execute("PRAGMA user_version = 1")
+        conn.close()
+
+        with ResultsStore(self.path) as store:
+            version = store.conn.execute("PRAGMA user_version").fetchone()[0]
+
+        self.assertEqual(version, Store.schema_version)
+        self.assertTrue({"runs_by_date", "dropped"} <= tables(self.path))
+
+    def test_current_version_untouched(self):
+        """
+            База текущей версии открывается без изменения схемы.
+        """
+
+        ResultsStore(self.path).close()
+
+        with mock.patch("worker.store.SCHEMA", ("CREATE TABLE marker (id INTEGER)", )):
+            ResultsStore(self.path).close()
+
+        self.assertNotIn("marker", tables(self.path))
+
+
+class MergeTest(unittest.TestCase):
+    """
+        Перенос запусков из базы другой игры в общую базу.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.local = os.path.join(self.tmp.name, "results.sqlite")
+        self.dump = os.path.join(self.tmp.name, "dump.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_merge_other_game(self):
+        """
+            Запуски другой игры добавляются, общие запуски не дублируются.
+        """
+
+        shared = datetime(2020, 5, 1, 12)
+
+        with ResultsStore(self.dump) as dump:
+            dump.save_run("NUM63RSgame", "", [record("alice", 10)], shared)
+            dump.save_run("7EQUEENCEgame", "", [record("bob", 7)], datetime(2020, 5, 2))
+
+        with ResultsStore(self.local) as local:
+            local.save_run("NUM63RSgame", "", [record("alice", 10)], shared)
+
+            self.assertEqual(local.merge(self.dump), 1)
+            self.assertEqual(local.merge(self.dump), 0)
+            self.assertEqual(local.previous_scores("7EQUEENCEgame", ""), {"bob": 7})
+            self.assertEqual(len(local.player_history("NUM63RSgame", "", "alice")), 1)
+
+    def test_dropped(self):
+        """
+            Выбывшие игроки хранятся с запуском и переносятся вместе с ним.
+        """
+
+        with ResultsStore(self.dump) as dump:
+            dump.save_run("NUM63RSgame", "", [record("alice", 10)], datetime(2020, 5, 1),
+                          dropped={"bob": 1, "carol": 0})
+
+        with ResultsStore(self.local) as local:
+            local.merge(self.dump)
+
+            self.assertEqual(list(local.previous_dropped("NUM63RSgame", "").items()),
+                             [("carol", 0), ("bob", 1)])
+            self.assertEqual(local.previous_dropped("7EQUEENCEgame", ""), {})
+
+    def test_latest_by_date(self):
+        """
+            Последним считается самый поздний по дате запуск, а не перенесённый последним.
+        """
+
+        with ResultsStore(self.dump) as dump:
+            dump.save_run("NUM63RSgame", "", [record("alice", 5)], datetime(2020, 4, 1))
+
+        with ResultsStore(self.local) as local:
+            local.save_run("NUM63RSgame", "", [record("alice", 10)], datetime(2020, 5, 1))
+            local.merge(self.dump)
+
+            self.assertEqual(local.previous_scores("NUM63RSgame", ""), {"alice": 10})
+            self.assertEqual(
+                [score for _, _, score in local.player_history("NUM63RSgame", "", "alice")],
+                [5, 10])
+
+
+class PreviousScoresTest(unittest.TestCase):
+    """
+        Очки прошлого запуска по дивизионам на базе с тысячами игроков.
+    """
+
+    players = 5000
+    divisions = ("_4x4", "_6x6")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "results.sqlite")
+
+        with ResultsStore(self.path) as store:
+            for num, compet in enumerate(self.divisions, 1):
+                store.save_run("TEEN48game", compet,
+                               [record(f"player_{i}", -i) for i in range(self.players)]
+                               + [record("retired", 1)],
+                               datetime(2020, 4, 1))
+                store.save_run("TEEN48game", compet,
+                               [record(f"player_{i}", i * num) for i in range(self.players)],
+                               datetime(2020, 5, 1))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_latest_run_per_division(self):
+        """
+            Для каждого дивизиона берутся очки его последнего запуска.
+        """
+
+        with ResultsStore(self.path) as store:
+            scores = {compet: store.previous_scores("TEEN48game", compet)
+                      for compet in self.divisions}
+
+        for num, compet in enumerate(self.divisions, 1):
+            self.assertEqual(scores[compet],
+                             {f"player_{i}": i * num for i in range(self.players)})
+
+    def test_older_runs_ignored(self):
+        """
+            Игрок, которого нет в последнем запуске, очков не получает.
+        """
+
+        with ResultsStore(self.path) as store:
+            scores = store.previous_scores("TEEN48game", "_4x4")
+
+        self.assertNotIn("retired", scores)
+
+    def test_new_players(self):
+        """
+            Для нового игрока и дивизиона без запусков очков нет.
+        """
+
+        with ResultsStore(self.path) as store:
+            self.assertNotIn("newcomer", store.previous_scores("TEEN48game", "_6x6"))
+            self.assertEqual(store.previous_scores("TEEN48game", "_8x8"), {})
+            self.assertEqual(store.previous_scores("R3463NTgame", "_10x10"), {})
+
+    def test_previous_standings(self):
+        """
+            Очки агента по дивизионам читаются из results.sqlite рабочего каталога.
+        """
+
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        self.addCleanup(EVALUATION.finish)
+
+        standings = previous_standings("TEEN48game", self.divisions)
+
+        self.assertEqual(standings["_4x4"]["player_4999"], 4999)
+        self.assertEqual(standings["_6x6"]["player_4999"], 9998)
+        self.assertEqual(len(standings["_6x6"]), self.players)
+        self.assertNotIn("retired", standings["_4x4"])
+
+
+class Payload:
+    """
+        Объект, при загрузке которого из pickle вызывается os.getcwd.
+    """
+
+    def __reduce__(self):
+        return (os.getcwd, ())
+
+
+class ImportDumpsTest(unittest.TestCase):
+    """
+        Импорт старых tbdump-файлов с ограниченным набором классов.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "results.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def dump(self, name, records):
+        """
+            Запись tbdump-файла во временный каталог.
+        """
+
+        with open(os.path.join(self.tmp.name, name), "wb") as results_dump:
+            pickle.dump(records, results_dump)
+
+    def test_time_interval_allowed(self):
+        """
+            Таблица с TimeInterval импортируется.
+        """
+
+        self.dump("tbdump_num63rsgame.obj",
+                  [[0, "alice", "@alice", "✅", TimeInterval(1.0, 2.0), "time"]])
+
+        with ResultsStore(self.path) as store:
+            store.import_dumps(os.path.join(self.tmp.name, "tbdump_*.obj"))
+            self.assertEqual(store.previous_players("NUM63RSgame", ""), ["alice"])
+
+    def test_other_classes_rejected(self):
+        """
+            Таблица с посторонним объектом пропускается, код при загрузке не вызывается.
+        """
+
+        self.dump("tbdump_num63rsgame.obj", [[0, "alice", "@alice", Payload()]])
+
+        with ResultsStore(self.path) as store:
+            store.import_dumps(os.path.join(self.tmp.name, "tbdump_*.obj"))
+            self.assertIsNone(store.latest_run("NUM63RSgame", ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
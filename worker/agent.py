@@ -4,17 +4,29 @@
 
 from typing import List
 import os
+import glob
+import shutil
 import argparse
-import pickle
+import queue
+import json
+import tempfile
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
+from datetime import datetime
+from functools import lru_cache
 from dataclasses import dataclass
 
 import gitlab
-import intervals
 import worker.wiki
 import worker.repo
+import worker.artifacts
+import worker.cache
+import worker.store
+import worker.interval
 from database import achievements
-from games.utils import utils
+from games.utils import utils, timing
 from games.numbers import numbers_runner
 from games.sequence import sequence_runner
 from games.xogame import xo_runner
@@ -32,12 +44,45 @@ class Agent:
         Константы agent.
     """
     sigma_coef = 3
+    conditions_seed = 2020
 
-    git_inst = gitlab.Gitlab.from_config("gitiu7", ["cfg/api_config.cfg"])
-    git_inst.auth()
+    games = ("NUM63RSgame", "7EQUEENCEgame", "XOgame", "STRgame", "TEEN48game",
+             "TR4V31game", "T3TR15game", "R3463NTgame", "W00DCUTT3Rgame")
+    batch_command = "all"
+
+    # Игры на время замеряют стратегии вперемешку на всех игроках сразу,
+    # поэтому их оценка с ростом числа собранных игроков не перекрывается.
+    pipelined_games = ("TEEN48game", "T3TR15game", "R3463NTgame")
+    timed_games = ("NUM63RSgame", "7EQUEENCEgame", "STRgame", "TR4V31game")
+
+    gitlab_id = "gitiu7"
+    api_config = "cfg/api_config.cfg"
 
     iu7games_id = 2546
-    iu7games = git_inst.projects.get(iu7games_id)
+
+    evaluator_poll = 5
+
+
+@lru_cache(maxsize=None)
+def git_instance():
+    """
+        Экземпляр GitLab, создаётся и авторизуется при первом обращении.
+    """
+
+    instance = gitlab.Gitlab.from_config(Agent.gitlab_id, [Agent.api_config])
+    instance.auth()
+    worker.cache.install_cache(instance)
+
+    return instance
+
+
+@lru_cache(maxsize=None)
+def iu7games_project():
+    """
+        Проект IU7Games без запроса к API: для вики и deploy job'ов нужен только id.
+    """
+
+    return git_instance().projects.get(Agent.iu7games_id, lazy=True)
 
 
 def choose_name(rec, mode):
@@ -55,7 +100,174 @@ def choose_name(rec, mode):
     return name
 
 
-def run_num63rsgame(results, mode):
+def player_lib(store, rec, mode, suffix):
+    """
+        Путь к библиотеке игрока из хранилища артефактов или "NULL".
+    """
+
+    return store.lib_path(rec[2], f"{choose_name(rec, mode)}{suffix}")
+
+
+def null_lib(lib):
+    """
+        Замена пути к библиотеке на "NULL" с сохранением остальных параметров игрока.
+    """
+
+    if isinstance(lib, str):
+        return "NULL"
+
+    return ("NULL", ) + tuple(lib[1:])
+
+
+def load_results_cache(cache_dump):
+    """
+        Загрузка кэша результатов: (SHA-256 библиотеки, конфигурация) ->
+        (результат, время получения). Кэш хранится в JSON, а не в pickle:
+        файл восстанавливается из артефактов deploy job'а.
+    """
+
+    if not os.path.exists(cache_dump):
+        return {}
+
+    try:
+        with open(cache_dump, "r") as results_dump:
+            return {
+                (lib_hash, tuple(config)): (result, datetime.fromisoformat(timestamp))
+                for (lib_hash, config), result, timestamp in json.load(results_dump)
+            }
+    except (ValueError, TypeError):
+        print(f"{cache_dump} IS DAMAGED, ALL PLAYERS WILL BE EVALUATED")
+        return {}
+
+
+def save_results_cache(cache_dump, cache):
+    """
+        Запись кэша результатов в JSON.
+    """
+
+    with open(cache_dump, "w") as results_dump:
+        json.dump([[[lib_hash, list(config)], result, timestamp.isoformat()]
+                   for (lib_hash, config), (result, timestamp) in cache.items()],
+                  results_dump)
+
+
+class Evaluation:
+    """
+        Состояние оценки игроков в процессе: кэши результатов, очки прошлого
+        запуска и уже напечатанные заголовки. При оценке по одному игроку
+        файлы кэшей и results.sqlite читаются один раз, а кэши записываются
+        на диск один раз в finish.
+    """
+
+    def __init__(self):
+        self.caches = {}
+        self.standings = {}
+        self.headers = set()
+
+    def results_cache(self, cache_dump):
+        """
+            Кэш результатов из файла cache_dump, файл читается при первом обращении.
+        """
+
+        if cache_dump not in self.caches:
+            self.caches[cache_dump] = load_results_cache(cache_dump)
+
+        return self.caches[cache_dump]
+
+    def previous_scores(self, game, compet):
+        """
+            Очки игроков дивизиона в прошлом запуске, база читается один раз.
+        """
+
+        key = (game, compet)
+
+        if key not in self.standings:
+            with worker.store.ResultsStore() as results_store:
+                self.standings[key] = results_store.previous_scores(game, compet)
+
+        return self.standings[key]
+
+    def header(self, title):
+        """
+            Печать заголовка результатов игры один раз за оценку.
+        """
+
+        if title not in self.headers:
+            self.headers.add(title)
+            print(title)
+
+    def finish(self):
+        """
+            Запись кэшей результатов на диск и сброс состояния оценки.
+        """
+
+        for cache_dump, cache in self.caches.items():
+            save_results_cache(cache_dump, cache)
+
+        self.caches.clear()
+        self.standings.clear()
+        self.headers.clear()
+
+
+EVALUATION = Evaluation()
+
+
+def run_cached(libs, config, cache_dump, runner):
+    """
+        Запуск ранера только для новых и изменившихся библиотек.
+
+        libs - пути к библиотекам игроков ("NULL" или кортежи, первый элемент которых - путь),
+        config - конфигурация и сид игры, входящие в ключ результата,
+        cache_dump - файл с результатами прошлых запусков,
+        runner - функция, получающая libs и возвращающая результаты в том же порядке.
+
+        Для библиотеки с тем же SHA-256 и той же конфигурацией ранер не запускается,
+        а берётся сохранённый результат вместе со временем его получения.
+        Новые результаты попадают в файл при EVALUATION.finish().
+    """
+
+    cache = EVALUATION.results_cache(cache_dump)
+
+    paths = [lib if isinstance(lib, str) else lib[0] for lib in libs]
+    keys = [None if path == "NULL" else (utils.lib_hash(path), config)
+            for path in paths]
+
+    results = runner([null_lib(lib) if key in cache else lib
+                      for lib, key in zip(libs, keys)])
+
+    for i, key in enumerate(keys):
+        if key is None:
+            continue
+        if key in cache:
+            results[i], timestamp = cache[key]
+            print(f"{utils.parsing_name(paths[i])}: RESULT FROM "
+                  f"{timestamp.strftime('%H:%M:%S %d.%m.%Y')} REUSED")
+        elif results[i] is not None:
+            cache[key] = (results[i], datetime.now())
+
+    return results
+
+
+def best_results(results, libs):
+    """
+        Результаты игр на очки с учётом прошлого рейтинга: в кэше хранятся
+        очки запуска, а в таблицу идёт лучшее из них и текущего рейтинга игрока.
+    """
+
+    return [res if res == utils.GameResult.no_result else max(res, lib[1])
+            for res, lib in zip(results, libs)]
+
+
+def previous_standings(game, compets):
+    """
+        Очки игроков в прошлом запуске по дивизионам игры:
+        дивизион -> {имя игрока: очки}. Каждый дивизион читается один раз за оценку.
+    """
+
+    return {compet: EVALUATION.previous_scores(game, compet) for compet in compets}
+
+
+def run_num63rsgame(results, mode, store):
     """
         Старт NUM63RSgame.
     """
@@ -65,42 +277,41 @@ def run_num63rsgame(results, mode):
     libs = []
 
     for rec in data:
-        lib_path = os.path.abspath(f"{choose_name(rec, mode)}_num63rs_lib.so")
-
-        if os.path.exists(lib_path):
-            libs.append(lib_path)
-        else:
-            libs.append("NULL")
+        libs.append(player_lib(store, rec, mode, "_num63rs_lib.so"))
 
-    print("NUM63RSGAME RESULTS\n")
-    results_def = numbers_runner.start_numbers_game(libs)
+    EVALUATION.header("NUM63RSGAME RESULTS\n")
+    results_def = run_cached(
+        libs,
+        ("NUM63RSgame", numbers_runner.MAX_LBORDER, numbers_runner.MAX_RBORDER,
+         timing.Timing.version),
+        "rescache_num63rsgame.json",
+        numbers_runner.start_numbers_game
+    )
 
     for i, rec in enumerate(data):
         sign = worker.wiki.Wiki.sign[1]
         if results_def[i][0] == worker.wiki.Wiki.no_result:
             rec[3:3] = [
                 sign,
-                intervals.closed(
-                    abs(worker.wiki.Wiki.no_result),
-                    intervals.inf
-                )
+                worker.interval.TimeInterval.missing(abs(worker.wiki.Wiki.no_result))
             ]
         else:
             sign = worker.wiki.Wiki.sign[results_def[i][0] != 0]
             rec[3:3] = [
                 sign,
-                intervals.closed(
+                worker.interval.TimeInterval(
                     round(results_def[i][1] - Agent.sigma_coef *
                           results_def[i][2], 7),
                     round(results_def[i][1] + Agent.sigma_coef *
                           results_def[i][2], 7)
                 )
             ]
+        rec.append(results_def[i][3])
 
     return data
 
 
-def run_7equeencegame(results, mode):
+def run_7equeencegame(results, mode, store):
     """
         Старт 7EQUEENCEgame.
     """
@@ -110,43 +321,40 @@ def run_7equeencegame(results, mode):
     libs = []
 
     for rec in data:
-        lib_path = os.path.abspath(
-            f"{choose_name(rec, mode)}_7equeence_lib.so")
+        libs.append(player_lib(store, rec, mode, "_7equeence_lib.so"))
 
-        if os.path.exists(lib_path):
-            libs.append(lib_path)
-        else:
-            libs.append("NULL")
-
-    print("7EQUEENCEGAME RESULTS\n")
-    results_def = sequence_runner.start_sequence_game(libs)
+    EVALUATION.header("7EQUEENCEGAME RESULTS\n")
+    results_def = run_cached(
+        libs,
+        ("7EQUEENCEgame", Agent.conditions_seed, timing.Timing.version),
+        "rescache_7equeencegame.json",
+        lambda libs: sequence_runner.start_sequence_game(libs, Agent.conditions_seed)
+    )
 
     for i, rec in enumerate(data):
         sign = worker.wiki.Wiki.sign[1]
         if results_def[i][0] == worker.wiki.Wiki.no_result:
             rec[3:3] = [
                 sign,
-                intervals.closed(
-                    abs(worker.wiki.Wiki.no_result),
-                    intervals.inf
-                )
+                worker.interval.TimeInterval.missing(abs(worker.wiki.Wiki.no_result))
             ]
         else:
             sign = worker.wiki.Wiki.sign[results_def[i][0] != 0]
             rec[3:3] = [
                 sign,
-                intervals.closed(
+                worker.interval.TimeInterval(
                     round(results_def[i][1] - Agent.sigma_coef *
                           results_def[i][2], 7),
                     round(results_def[i][1] + Agent.sigma_coef *
                           results_def[i][2], 7)
                 )
             ]
+        rec.append(results_def[i][3])
 
     return data
 
 
-def run_xogame(results, mode):
+def run_xogame(results, mode, store):
     """
         Старт XOgame.
     """
@@ -157,40 +365,23 @@ def run_xogame(results, mode):
     libs_3x3 = []
     libs_5x5 = []
 
-    results_3x3_old = []
-    results_5x5_old = []
-
-    if os.path.exists("tbdump_xogame_3x3.obj"):
-        results_3x3_dump = open("tbdump_xogame_3x3.obj", "rb")
-        results_3x3_old = pickle.load(results_3x3_dump)
-    if os.path.exists("tbdump_xogame_5x5.obj"):
-        results_5x5_dump = open("tbdump_xogame_5x5.obj", "rb")
-        results_5x5_old = pickle.load(results_5x5_dump)
+    standings = previous_standings("XOgame", ("_3x3", "_5x5"))
 
     for rec_3x3, rec_5x5 in zip(data_3x3, data_5x5):
-        rating_3x3 = 1000
-        rating_5x5 = 1000
+        rating_3x3 = standings["_3x3"].get(rec_3x3[1], 1000)
+        rating_5x5 = standings["_5x5"].get(rec_5x5[1], 1000)
 
-        for rec_3x3_old, rec_5x5_old in zip(results_3x3_old, results_5x5_old):
-            if rec_3x3[1] == rec_3x3_old[1]:
-                rating_3x3 = rec_3x3_old[3]
-            if rec_5x5[1] == rec_5x5_old[1]:
-                rating_5x5 = rec_5x5_old[3]
+        lib_path = player_lib(store, rec_3x3, mode, "_xo_lib.so")
+        libs_3x3.append((lib_path, rating_3x3))
+        libs_5x5.append((lib_path, rating_5x5))
 
-        lib_path = os.path.abspath(f"{choose_name(rec_3x3, mode)}_xo_lib.so")
-
-        if os.path.exists(lib_path):
-            libs_3x3.append((lib_path, rating_3x3))
-            libs_5x5.append((lib_path, rating_5x5))
-        else:
-            libs_3x3.append(("NULL", rating_3x3))
-            libs_5x5.append(("NULL", rating_5x5))
-
-    print("XOGAME RESULTS\n")
+    EVALUATION.header("XOGAME RESULTS\n")
     print("\n3X3 DIV\n")
-    results_3x3 = xo_runner.start_xogame_competition(libs_3x3, 3)
+    results_3x3 = xo_runner.start_xogame_competition(
+        libs_3x3, 3, "pairdump_xogame_3x3.json")
     print("\n5X5 DIV\n")
-    results_5x5 = xo_runner.start_xogame_competition(libs_5x5, 5)
+    results_5x5 = xo_runner.start_xogame_competition(
+        libs_5x5, 5, "pairdump_xogame_5x5.json")
 
     i = 0
     for rec_3x3, rec_5x5 in zip(data_3x3, data_5x5):
@@ -201,74 +392,91 @@ def run_xogame(results, mode):
     return (data_3x3, data_5x5)
 
 
-def run_strgame(results, mode):
+def strgame_runner(runner, test_path):
     """
-        Старт STRgame.
+        Формирование ранера STRgame для списка библиотек.
     """
 
-    data_split = deepcopy(results)
-    data_strtok = deepcopy(results)
+    def run(libs):
+        """
+            Запуск функции STRgame сразу для всех библиотек:
+            стратегии игроков замеряются вперемешку.
+        """
 
-    print("STRGAME RESULTS\n")
-    for rec_split, rec_strtok in zip(data_split, data_strtok):
+        if not os.path.exists(test_path):
+            return [None] * len(libs)
 
-        print(f"{rec_split[1]}:")
+        return runner(libs, test_path)
 
-        lib_path = os.path.abspath(
-            f"{choose_name(rec_split, mode)}_split_lib.so")
-        test_path = os.path.abspath("games/strgame/tests/split")
+    return run
 
-        if os.path.exists(lib_path) and os.path.exists(test_path):
-            split_res = split_runner.start_split(lib_path, test_path)
-            sign = worker.wiki.Wiki.sign[0]
-            if split_res[0] != 0:
-                sign = worker.wiki.Wiki.sign[1]
-            rec_split[3:3] = [
-                sign,
-                intervals.closed(
-                    round(split_res[1] - Agent.sigma_coef * split_res[2], 7),
-                    round(split_res[1] + Agent.sigma_coef * split_res[2], 7)
-                )
-            ]
-        else:
-            rec_split[3:3] = [
-                worker.wiki.Wiki.sign[1],
-                intervals.closed(
-                    abs(worker.wiki.Wiki.no_result),
-                    intervals.inf
-                )
-            ]
 
-        lib_path = os.path.abspath(
-            f"{choose_name(rec_strtok, mode)}_strtok_lib.so")
-        test_path = os.path.abspath("games/strgame/tests/strtok")
+def strgame_records(data, results_def):
+    """
+        Запись результатов STRgame в таблицу.
+    """
 
-        if os.path.exists(lib_path) and os.path.exists(test_path):
-            strtok_res = strtok_runner.start_strtok(lib_path, test_path)
+    for rec, res in zip(data, results_def):
+        if res is None:
+            rec[3:3] = [
+                worker.wiki.Wiki.sign[1],
+                worker.interval.TimeInterval.missing(abs(worker.wiki.Wiki.no_result))
+            ]
+            rec.append(None)
+        else:
             sign = worker.wiki.Wiki.sign[0]
-            if strtok_res[0] != 0:
+            if res[0] != 0:
                 sign = worker.wiki.Wiki.sign[1]
-            rec_strtok[3:3] = [
+            rec[3:3] = [
                 sign,
-                intervals.closed(
-                    round(strtok_res[1] - Agent.sigma_coef * strtok_res[2], 7),
-                    round(strtok_res[1] + Agent.sigma_coef * strtok_res[2], 7)
-                )
-            ]
-        else:
-            rec_strtok[3:3] = [
-                worker.wiki.Wiki.sign[1],
-                intervals.closed(
-                    abs(worker.wiki.Wiki.no_result),
-                    intervals.inf
+                worker.interval.TimeInterval(
+                    round(res[1] - Agent.sigma_coef * res[2], 7),
+                    round(res[1] + Agent.sigma_coef * res[2], 7)
                 )
             ]
-        print()
+            rec.append(res[3])
+
+
+def run_strgame(results, mode, store):
+    """
+        Старт STRgame.
+    """
+
+    data_split = deepcopy(results)
+    data_strtok = deepcopy(results)
+
+    libs_split = []
+    libs_strtok = []
+
+    for rec in results:
+        libs_split.append(player_lib(store, rec, mode, "_split_lib.so"))
+        libs_strtok.append(player_lib(store, rec, mode, "_strtok_lib.so"))
+
+    EVALUATION.header("STRGAME RESULTS\n")
+    print("\nSPLIT\n")
+    results_split = run_cached(
+        libs_split,
+        ("STRgame", "split", split_runner.STRING_MULTIPLIER, timing.Timing.version),
+        "rescache_strgame.json",
+        strgame_runner(split_runner.start_split,
+                       os.path.abspath("games/strgame/tests/split"))
+    )
+    print("\nSTRTOK\n")
+    results_strtok = run_cached(
+        libs_strtok,
+        ("STRgame", "strtok", strtok_runner.STRING_MULTIPLIER, timing.Timing.version),
+        "rescache_strgame.json",
+        strgame_runner(strtok_runner.start_strtok,
+                       os.path.abspath("games/strgame/tests/strtok"))
+    )
+
+    strgame_records(data_split, results_split)
+    strgame_records(data_strtok, results_strtok)
 
     return (data_split, data_strtok)
 
 
-def run_teen48game(results, mode):
+def run_teen48game(results, mode, store):
     """
         Старт TEEN48game.
     """
@@ -279,41 +487,29 @@ def run_teen48game(results, mode):
     libs_4x4 = []
     libs_6x6 = []
 
-    results_4x4_old = []
-    results_6x6_old = []
-
-    if os.path.exists("tbdump_teen48game_4x4.obj"):
-        results_4x4_dump = open("tbdump_teen48game_4x4.obj", "rb")
-        results_4x4_old = pickle.load(results_4x4_dump)
-    if os.path.exists("tbdump_teen48game_6x6.obj"):
-        results_6x6_dump = open("tbdump_teen48game_6x6.obj", "rb")
-        results_6x6_old = pickle.load(results_6x6_dump)
+    standings = previous_standings("TEEN48game", ("_4x4", "_6x6"))
 
     for rec_4x4, rec_6x6 in zip(data_4x4, data_6x6):
-        rating_4x4 = 0
-        rating_6x6 = 0
-
-        for rec_4x4_old, rec_6x6_old in zip(results_4x4_old, results_6x6_old):
-            if rec_4x4[1] == rec_4x4_old[1]:
-                rating_4x4 = rec_4x4_old[3]
-            if rec_6x6[1] == rec_6x6_old[1]:
-                rating_6x6 = rec_6x6_old[3]
-
-        lib_path = os.path.abspath(
-            f"{choose_name(rec_4x4, mode)}_teen48_lib.so")
+        rating_4x4 = standings["_4x4"].get(rec_4x4[1], 0)
+        rating_6x6 = standings["_6x6"].get(rec_6x6[1], 0)
 
-        if os.path.exists(lib_path):
-            libs_4x4.append((lib_path, rating_4x4))
-            libs_6x6.append((lib_path, rating_6x6))
-        else:
-            libs_4x4.append(("NULL", rating_4x4))
-            libs_6x6.append(("NULL", rating_6x6))
+        lib_path = player_lib(store, rec_4x4, mode, "_teen48_lib.so")
+        libs_4x4.append((lib_path, rating_4x4))
+        libs_6x6.append((lib_path, rating_6x6))
 
-    print("TEEN48GAME RESULTS\n")
+    EVALUATION.header("TEEN48GAME RESULTS\n")
     print("\n4X4 DIV\n")
-    results_4x4 = teen48_runner.start_teen48game_competition(libs_4x4, 4)
+    results_4x4 = best_results(run_cached(
+        libs_4x4, ("TEEN48game", 4, Agent.conditions_seed), "rescache_teen48game.json",
+        lambda libs: teen48_runner.start_teen48game_competition(
+            libs, 4, Agent.conditions_seed, keep_best=False)
+    ), libs_4x4)
     print("\n6X6 DIV\n")
-    results_6x6 = teen48_runner.start_teen48game_competition(libs_6x6, 6)
+    results_6x6 = best_results(run_cached(
+        libs_6x6, ("TEEN48game", 6, Agent.conditions_seed), "rescache_teen48game.json",
+        lambda libs: teen48_runner.start_teen48game_competition(
+            libs, 6, Agent.conditions_seed, keep_best=False)
+    ), libs_6x6)
 
     i = 0
     for rec_4x4, rec_6x6 in zip(data_4x4, data_6x6):
@@ -324,7 +520,7 @@ def run_teen48game(results, mode):
     return (data_4x4, data_6x6)
 
 
-def run_tr4v31game(results, mode):
+def run_tr4v31game(results, mode, store):
     """
         Старт TR4V31game
     """
@@ -334,44 +530,42 @@ def run_tr4v31game(results, mode):
     libs = []
 
     for rec in data:
-        lib_path = os.path.abspath(f"{choose_name(rec, mode)}_tr4v31_lib.so")
-
-        if os.path.exists(lib_path):
-            libs.append(lib_path)
-        else:
-            libs.append("NULL")
+        libs.append(player_lib(store, rec, mode, "_tr4v31_lib.so"))
 
-    print("TR4V31GAME RESULTS\n")
+    EVALUATION.header("TR4V31GAME RESULTS\n")
 
     test_path = os.path.abspath("games/travelgame/tests")
-    results_def = travel_runner.start_travel_game(libs, test_path)
+    results_def = run_cached(
+        libs,
+        ("TR4V31game", Agent.conditions_seed, timing.Timing.version),
+        "rescache_tr4v31game.json",
+        lambda libs: travel_runner.start_travel_game(libs, test_path, Agent.conditions_seed)
+    )
 
     for i, rec in enumerate(data):
         sign = worker.wiki.Wiki.sign[1]
         if results_def[i][0] == worker.wiki.Wiki.no_result:
             rec[3:3] = [
                 sign,
-                intervals.closed(
-                    abs(worker.wiki.Wiki.no_result),
-                    intervals.inf
-                )
+                worker.interval.TimeInterval.missing(abs(worker.wiki.Wiki.no_result))
             ]
         else:
             sign = worker.wiki.Wiki.sign[results_def[i][0] != 0]
             rec[3:3] = [
                 sign,
-                intervals.closed(
+                worker.interval.TimeInterval(
                     round(results_def[i][1] - Agent.sigma_coef *
                           results_def[i][2], 7),
                     round(results_def[i][1] + Agent.sigma_coef *
                           results_def[i][2], 7)
                 )
             ]
+        rec.append(results_def[i][3])
 
     return data
 
 
-def run_t3tr15game(results, mode):
+def run_t3tr15game(results, mode, store):
     """
         Старт T3RT15game.
     """
@@ -380,29 +574,18 @@ def run_t3tr15game(results, mode):
 
     libs = []
 
-    results_old = []
-
-    if os.path.exists("tbdump_t3tr15game.obj"):
-        with open("tbdump_t3tr15game.obj", "rb") as results_dump:
-            results_old = pickle.load(results_dump)
+    standings = previous_standings("T3TR15game", ("", ))[""]
 
     for rec in data:
-        rating = 0
-
-        for rec_old in results_old:
-            if rec[1] == rec_old[1]:
-                rating = rec_old[3]
-
-        lib_path = os.path.abspath(
-            f"{choose_name(rec, mode)}_t3tr15_lib.so")
-
-        if os.path.exists(lib_path):
-            libs.append((lib_path, rating))
-        else:
-            libs.append(("NULL", rating))
+        rating = standings.get(rec[1], 0)
+        libs.append((player_lib(store, rec, mode, "_t3tr15_lib.so"), rating))
 
-    print("T3TR15 RESULTS\n")
-    results = tetris_runner.start_tetris_competition(libs)
+    EVALUATION.header("T3TR15 RESULTS\n")
+    results = best_results(run_cached(
+        libs, ("T3TR15game", Agent.conditions_seed), "rescache_t3tr15game.json",
+        lambda libs: tetris_runner.start_tetris_competition(
+            libs, Agent.conditions_seed, keep_best=False)
+    ), libs)
 
     for i, rec in enumerate(data):
         rec.insert(3, results[i])
@@ -410,7 +593,7 @@ def run_t3tr15game(results, mode):
     return data
 
 
-def run_r3463ntgame(results, mode):
+def run_r3463ntgame(results, mode, store):
     """
         Старт R3463NTgame.
     """
@@ -421,41 +604,29 @@ def run_r3463ntgame(results, mode):
     libs_10x10 = []
     libs_20x20 = []
 
-    results_10x10_old = []
-    results_20x20_old = []
-
-    if os.path.exists("tbdump_r3463ntgame_10x10.obj"):
-        results_10x10_dump = open("tbdump_r3463ntgame_10x10.obj", "rb")
-        results_10x10_old = pickle.load(results_10x10_dump)
-    if os.path.exists("tbdump_r3463ntgame_20x20.obj"):
-        results_20x20_dump = open("tbdump_r3463ntgame_20x20.obj", "rb")
-        results_20x20_old = pickle.load(results_20x20_dump)
+    standings = previous_standings("R3463NTgame", ("_10x10", "_20x20"))
 
     for rec_10x10, rec_20x20 in zip(data_10x10, data_20x20):
-        rating_10x10 = 0
-        rating_20x20 = 0
-
-        for rec_10x10_old, rec_20x20_old in zip(results_10x10_old, results_20x20_old):
-            if rec_10x10[1] == rec_10x10_old[1]:
-                rating_10x10 = rec_10x10_old[3]
-            if rec_20x20[1] == rec_20x20_old[1]:
-                rating_20x20 = rec_20x20_old[3]
-
-        lib_path = os.path.abspath(
-            f"{choose_name(rec_10x10, mode)}_r3463nt_lib.so")
+        rating_10x10 = standings["_10x10"].get(rec_10x10[1], 0)
+        rating_20x20 = standings["_20x20"].get(rec_20x20[1], 0)
 
-        if os.path.exists(lib_path):
-            libs_10x10.append((lib_path, rating_10x10))
-            libs_20x20.append((lib_path, rating_20x20))
-        else:
-            libs_10x10.append(("NULL", rating_10x10))
-            libs_20x20.append(("NULL", rating_20x20))
+        lib_path = player_lib(store, rec_10x10, mode, "_r3463nt_lib.so")
+        libs_10x10.append((lib_path, rating_10x10))
+        libs_20x20.append((lib_path, rating_20x20))
 
-    print("R3463NTGAME RESULTS\n")
+    EVALUATION.header("R3463NTGAME RESULTS\n")
     print("\n10X10 DIV\n")
-    results_10x10 = reagent_runner.start_reagent_competition(libs_10x10, 10)
+    results_10x10 = best_results(run_cached(
+        libs_10x10, ("R3463NTgame", 10, Agent.conditions_seed), "rescache_r3463ntgame.json",
+        lambda libs: reagent_runner.start_reagent_competition(
+            libs, 10, Agent.conditions_seed, keep_best=False)
+    ), libs_10x10)
     print("\n20X20 DIV\n")
-    results_20x20 = reagent_runner.start_reagent_competition(libs_20x20, 20)
+    results_20x20 = best_results(run_cached(
+        libs_20x20, ("R3463NTgame", 20, Agent.conditions_seed), "rescache_r3463ntgame.json",
+        lambda libs: reagent_runner.start_reagent_competition(
+            libs, 20, Agent.conditions_seed, keep_best=False)
+    ), libs_20x20)
 
     i = 0
     for rec_10x10, rec_20x20 in zip(data_10x10, data_20x20):
@@ -466,7 +637,7 @@ def run_r3463ntgame(results, mode):
     return (data_10x10, data_20x20)
 
 
-def run_w00dcutt3rgame(results, mode):
+def run_w00dcutt3rgame(results, mode, store):
     """
         Старт W00DCUTT3Rgame.
     """
@@ -475,28 +646,15 @@ def run_w00dcutt3rgame(results, mode):
 
     libs = []
 
-    results_old = []
-
-    if os.path.exists("tbdump_w00dcutt3rgame.obj"):
-        with open("tbdump_w00dcutt3rgame.obj", "rb") as results_dump:
-            results_old = pickle.load(results_dump)
+    standings = previous_standings("W00DCUTT3Rgame", ("", ))[""]
 
     for rec in data:
-        rating = 1000
-
-        for rec_old in results_old:
-            if rec[1] == rec_old[1]:
-                rating = rec_old[3]
+        rating = standings.get(rec[1], 1000)
+        libs.append((player_lib(store, rec, mode, "_w00dcutt3r_lib.so"), rating))
 
-        lib_path = os.path.abspath(f"{choose_name(rec, mode)}_w00dcutt3r_lib.so")
-
-        if os.path.exists(lib_path):
-            libs.append((lib_path, rating))
-        else:
-            libs.append(("NULL", rating))
-
-    print("W00DCUTT3R RESULTS\n")
-    results = woodcutter_runner.start_woodcutter_game(libs)
+    EVALUATION.header("W00DCUTT3R RESULTS\n")
+    results = woodcutter_runner.start_woodcutter_game(
+        libs, "pairdump_w00dcutt3rgame.json")
 
     for i, rec in enumerate(data):
         rec.insert(3, results[i])
@@ -514,46 +672,48 @@ def update_results(game_name: str, results: List[achievements.PlayerResult]) ->
         print("Во время обработки достижений что-то пошло не так")
         print(err)
 
-def start_competition(instance, game, group_name, stage, is_practice):
+
+def run_game(game, results, mode, store=None):
     """
-        Старт соревнования с собранными стратегиями.
+        Запуск игры на записях игроков с библиотеками из хранилища store
+        (по умолчанию - из манифеста на диске).
+        Возвращает результаты первой и второй таблиц (вторая может быть пустой).
     """
 
-    results = worker.repo.get_group_artifacts(instance, game, group_name)
+    if store is None:
+        store = worker.artifacts.ArtifactStore.load()
+
     fresults = []
     sresults = []
 
-    if is_practice == "practice":
-        game += "_practice"
-
-    if stage == "release":
-        print(f"SEARCHING FOR {game.upper()}"
-              " DEPLOY JOB TO COMPARE NEW RESULTS WITH PREVIOUS ONES")
-        deploy_job = worker.repo.get_deploy_job(
-            Agent.iu7games, game.lower(), "master")
-        if deploy_job is not None:
-            print(f"{game.upper()} DEPLOY JOB FOUND."
-                  " NEW RESULTS WILL BE AFFECTED BY PREVIOUS ONES\n")
-            worker.repo.get_artifacts(Agent.iu7games, deploy_job)
-        else:
-            print(f"{game.upper()} DEPLOY JOB NOT FOUND. FRESH START\n")
-    elif stage == "build":
-        print(f"START BUILD FOR {game.upper()}\n")
-
     if game.startswith("NUM63RSgame"):
-        fresults = run_num63rsgame(results, is_practice)
+        fresults = run_num63rsgame(results, mode, store)
     elif game.startswith("7EQUEENCEgame"):
-        fresults = run_7equeencegame(results, is_practice)
+        fresults = run_7equeencegame(results, mode, store)
     elif game.startswith("XOgame"):
-        fresults, sresults = run_xogame(results, is_practice)
+        fresults, sresults = run_xogame(results, mode, store)
     elif game.startswith("STRgame"):
-        fresults, sresults = run_strgame(results, is_practice)
+        fresults, sresults = run_strgame(results, mode, store)
     elif game.startswith("TEEN48game"):
-        fresults, sresults = run_teen48game(results, is_practice)
+        fresults, sresults = run_teen48game(results, mode, store)
     elif game.startswith("TR4V31game"):
-        fresults = run_tr4v31game(results, is_practice)
+        fresults = run_tr4v31game(results, mode, store)
     elif game.startswith("T3TR15game"):
-        fresults = run_t3tr15game(results, is_practice)
+        fresults = run_t3tr15game(results, mode, store)
+    elif game.startswith("R3463NTgame"):
+        fresults, sresults = run_r3463ntgame(results, mode, store)
+    elif game.startswith("W00DCUTT3Rgame"):
+        fresults = run_w00dcutt3rgame(results, mode, store)
+
+    return fresults, sresults
+
+
+def update_achievements(game, fresults, sresults):
+    """
+        Обновление достижений игроков по итогам игры.
+    """
+
+    if game.startswith("T3TR15game"):
         update_results(
             "T3TR15game",
             [
@@ -568,7 +728,6 @@ def start_competition(instance, game, group_name, stage, is_practice):
             ]
         )
     elif game.startswith("R3463NTgame"):
-        fresults, sresults = run_r3463ntgame(results, is_practice)
         update_results(
             "R3463NTgame10x10",
             [
@@ -596,7 +755,6 @@ def start_competition(instance, game, group_name, stage, is_practice):
             ]
         )
     elif game.startswith("W00DCUTT3Rgame"):
-        fresults = run_w00dcutt3rgame(results, is_practice)
         update_results(
             "W00DCUTT3Rgame",
             [
@@ -611,20 +769,296 @@ def start_competition(instance, game, group_name, stage, is_practice):
             ]
         )
 
+
+def run_pinned(cores, game, results, mode):
+    """
+        Запуск игры в процессе, закреплённом за ядрами cores.
+    """
+
+    with timing.pinned(cores):
+        try:
+            return run_game(game, results, mode)
+        finally:
+            EVALUATION.finish()
+
+
+def assign_cores(branches):
+    """
+        Ядра для игр: каждая игра на время получает выделенное ядро,
+        остальные игры делят общие ядра. Ветка -> множество ядер.
+    """
+
+    timed = [branch for branch in branches if branch in Agent.timed_games]
+    cores, shared = timing.dedicated_cores(len(timed))
+    affinity = dict.fromkeys(branches, shared)
+
+    for branch, core in zip(timed, cores):
+        affinity[branch] = core or shared
+
+    return affinity
+
+
+class EvaluationError(RuntimeError):
+    """
+        Ошибка или аварийное завершение процесса оценки игроков.
+    """
+
+
+def evaluation_worker(game, mode, tasks, done):
+    """
+        Процесс оценки игроков: получает записи игроков вместе с их библиотеками
+        из очереди tasks по мере сбора артефактов и отдаёт результаты в очередь done.
+        Хранилище артефактов и кэши результатов держатся в памяти,
+        кэши записываются на диск один раз по признаку конца.
+        Исключение передаётся в done как EvaluationError с трассировкой;
+        признак конца None отправляется в любом случае.
+    """
+
+    try:
+        store = worker.artifacts.ArtifactStore()
+
+        try:
+            for rec, libs in iter(tasks.get, None):
+                store.update(rec[2], libs)
+                done.put(run_game(game, [rec], mode, store))
+        finally:
+            EVALUATION.finish()
+    except Exception:  # pylint: disable=broad-except
+        done.put(EvaluationError(traceback.format_exc()))
+    finally:
+        done.put(None)
+
+
+def evaluation_results(evaluator, done):
+    """
+        Результаты процесса оценки по мере готовности.
+        Очередь опрашивается с таймаутом, поэтому завершившийся без признака
+        конца процесс (например, после segmentation fault в библиотеке игрока)
+        не оставляет агента ждать вечно.
+    """
+
+    while True:
+        try:
+            item = done.get(timeout=Agent.evaluator_poll)
+        except queue.Empty:
+            if evaluator.is_alive():
+                continue
+            try:
+                item = done.get(timeout=Agent.evaluator_poll)
+            except queue.Empty:
+                raise EvaluationError(
+                    f"EVALUATOR EXITED WITH CODE {evaluator.exitcode}") from None
+
+        if item is None:
+            return
+        if isinstance(item, EvaluationError):
+            raise item
+
+        yield item
+
+
+def collect_and_run(instance, branch, game, group_name, mode):
+    """
+        Сбор артефактов и оценка игроков одновременно.
+        Оценка идёт в отдельном процессе, по игроку сразу после сбора
+        его артефактов. Только для игр без замеров времени (Agent.pipelined_games).
+    """
+
+    tasks = multiprocessing.Queue()
+    done = multiprocessing.Queue()
+
+    evaluator = multiprocessing.Process(
+        target=evaluation_worker, args=(game, mode, tasks, done))
+    evaluator.start()
+
+    store = new_store()
+
+    try:
+        worker.repo.get_group_artifacts(
+            instance, branch, group_name, store,
+            on_collected=lambda rec: tasks.put((rec, store.player_libs(rec[2]))))
+    finally:
+        tasks.put(None)
+
+    fresults = []
+    sresults = []
+
+    try:
+        for fres, sres in evaluation_results(evaluator, done):
+            fresults += fres
+            sresults += sres
+    finally:
+        evaluator.join()
+
+    fresults.sort(key=lambda rec: int(rec[0]))
+    sresults.sort(key=lambda rec: int(rec[0]))
+
+    return fresults, sresults
+
+
+def new_store():
+    """
+        Создание пустого хранилища артефактов для текущего запуска.
+    """
+
+    store = worker.artifacts.ArtifactStore()
+    store.save()
+
+    return store
+
+
+def get_previous_results(game):
+    """
+        Получение результатов прошлого релиза из артефактов deploy job'а.
+        У каждой игры в артефактах свой results.sqlite, поэтому артефакты
+        распаковываются во временный каталог: JSON-кэши игры переносятся
+        в рабочий каталог, запуски из её базы - в общую базу,
+        а старые tbdump-файлы импортируются прямо из временного каталога.
+    """
+
+    print(f"SEARCHING FOR {game.upper()}"
+          " DEPLOY JOB TO COMPARE NEW RESULTS WITH PREVIOUS ONES")
+    deploy_job = worker.repo.get_deploy_job(
+        iu7games_project(), game.lower(), "master")
+    if deploy_job is not None:
+        print(f"{game.upper()} DEPLOY JOB FOUND."
+              " NEW RESULTS WILL BE AFFECTED BY PREVIOUS ONES\n")
+        with tempfile.TemporaryDirectory() as dump_dir, \
+                worker.store.ResultsStore() as results_store:
+            worker.repo.get_artifacts(
+                deploy_job, patterns=worker.repo.Repo.dump_patterns, dest=dump_dir)
+            for dump_path in glob.glob(os.path.join(dump_dir, "*.json")):
+                shutil.move(dump_path, os.path.basename(dump_path))
+            dump_path = os.path.join(dump_dir, worker.store.Store.path)
+            if os.path.exists(dump_path):
+                merged = results_store.merge(dump_path)
+                print(f"{merged} {game.upper()} RUNS MERGED INTO {worker.store.Store.path}")
+            results_store.import_dumps(
+                os.path.join(dump_dir, worker.store.Store.legacy_dumps))
+    else:
+        print(f"{game.upper()} DEPLOY JOB NOT FOUND. FRESH START\n")
+
+
+def game_name(branch, is_practice):
+    """
+        Имя игры для результатов и вики по имени ветки.
+    """
+
+    if is_practice == "practice":
+        return f"{branch}_practice"
+
+    return branch
+
+
+def publish_results(game, fresults, sresults, stage):
+    """
+        Обновление достижений и, на релизе, вики-страницы игры.
+    """
+
+    update_achievements(game, fresults, sresults)
+
     if stage == "release":
-        worker.wiki.update_wiki(Agent.iu7games, game, fresults, sresults)
+        worker.wiki.update_wiki(iu7games_project(), game, fresults, sresults)
         print(f"\nWIKI PAGE FOR {game.upper()} UPDATED SUCCESSFULLY")
+
+
+def start_competition(instance, game, group_name, stage, is_practice):
+    """
+        Старт соревнования с собранными стратегиями.
+        Для игр без взаимодействия игроков и без замеров времени оценка
+        начинается сразу после сбора артефактов очередного игрока.
+        Игры на время запускаются после сбора всех артефактов
+        на выделенном ядре, если оно есть.
+    """
+
+    branch = game
+    game = game_name(branch, is_practice)
+
+    if stage == "release":
+        get_previous_results(game)
     elif stage == "build":
+        print(f"START BUILD FOR {game.upper()}\n")
+
+    if branch in Agent.pipelined_games:
+        fresults, sresults = collect_and_run(
+            instance, branch, game, group_name, is_practice)
+    else:
+        results = worker.repo.get_group_artifacts(
+            instance, branch, group_name, new_store())
+        fresults, sresults = run_pinned(
+            assign_cores((branch, ))[branch], game, results, is_practice)
+
+    publish_results(game, fresults, sresults, stage)
+
+    if stage == "build":
         print("\nBUILD PASSED")
 
 
+def start_batch(instance, branches, group_name, stage, is_practice):
+    """
+        Старт соревнований сразу по нескольким играм.
+        Артефакты всех веток собираются за один проход по группе
+        в общее хранилище, игры оцениваются параллельно в отдельных процессах
+        (игры на время - каждая на своём ядре),
+        вики-страницы публикуются после окончания всех игр.
+    """
+
+    games = {branch: game_name(branch, is_practice) for branch in branches}
+
+    for game in games.values():
+        if stage == "release":
+            get_previous_results(game)
+        elif stage == "build":
+            print(f"START BUILD FOR {game.upper()}\n")
+
+    collected = worker.repo.collect_group(instance, branches, group_name, new_store())
+
+    affinity = assign_cores(branches)
+
+    with ProcessPoolExecutor(max_workers=min(len(branches), os.cpu_count())) as executor:
+        futures = {
+            branch: executor.submit(run_pinned, affinity[branch],
+                                    games[branch], collected[branch], is_practice)
+            for branch in branches
+        }
+
+        results = {branch: future.result() for branch, future in futures.items()}
+
+    pages = []
+
+    for branch in branches:
+        fresults, sresults = results[branch]
+        update_achievements(games[branch], fresults, sresults)
+        if stage == "release":
+            pages += worker.wiki.render_pages(games[branch], fresults, sresults)
+
+    if stage == "release":
+        worker.wiki.publish_pages(iu7games_project(), pages)
+        print("\nWIKI PAGES UPDATED SUCCESSFULLY")
+    elif stage == "build":
+        print("\nBUILD PASSED")
+
+
+def parse_games(game):
+    """
+        Список веток игр из аргумента командной строки:
+        одна игра, несколько игр через запятую или все игры.
+    """
+
+    if game == Agent.batch_command:
+        return Agent.games
+
+    return tuple(game.split(","))
+
+
 def add_args():
     """
         Добавление аргументов командной строки для агента.
     """
 
     parser = argparse.ArgumentParser()
-    parser.add_argument("game", help="Select a game")
+    parser.add_argument(
+        "game", help=f"Select a game, comma-separated games or '{Agent.batch_command}'")
     parser.add_argument("group_name", help="Select a GitLab group")
     parser.add_argument("stage", help="Select a stage for run")
     parser.add_argument("is_practice", help="Is it is practice group")
@@ -636,5 +1070,15 @@ def add_args():
 if __name__ == "__main__":
     ARGS = add_args()
 
-    start_competition(Agent.git_inst, ARGS.game, ARGS.group_name,
-                      ARGS.stage, ARGS.is_practice)
+    INSTANCE = git_instance()
+    BRANCHES = parse_games(ARGS.game)
+
+    if len(BRANCHES) == 1:
+        start_competition(INSTANCE, BRANCHES[0], ARGS.group_name,
+                          ARGS.stage, ARGS.is_practice)
+    else:
+        start_batch(INSTANCE, BRANCHES, ARGS.group_name,
+                    ARGS.stage, ARGS.is_practice)
+
+    print("\nAPI LATENCY BY ENDPOINT")
+    INSTANCE.client_metrics.report()
@@ -0,0 +1,159 @@
+"""
+    Модуль хранилища артефактов игроков.
+
+    Артефакты каждого игрока распаковываются в отдельный каталог,
+    названный по SHA-256 архива артефактов. Манифест связывает библиотеки
+    игрока с каталогами, где они лежат, и обновляется после каждого архива,
+    поэтому читать его можно, не дожидаясь окончания сбора.
+    Имена библиотек разных игр различаются, так что в одном хранилище
+    помещаются артефакты игрока со всех веток.
+"""
+
+
+import os
+import json
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass
+
+
+@dataclass
+class Artifacts:
+    """
+        Константы хранилища артефактов.
+    """
+    root = "artifacts"
+    manifest = "manifest.json"
+
+
+class SpooledBuffer(tempfile.SpooledTemporaryFile):
+    """
+        Буфер для архива артефактов: в памяти до max_size байт,
+        дальше во временном файле. zipfile обращается к seekable(),
+        а у SpooledTemporaryFile этот метод есть только с Python 3.11.
+    """
+
+    def seekable(self):
+        return self._file.seekable()
+
+    def readable(self):
+        return self._file.readable()
+
+
+class ArtifactStore:
+    """
+        Хранилище артефактов с манифестом игрок -> библиотека -> SHA-256 архива.
+    """
+
+    def __init__(self, root=Artifacts.root):
+        self.root = os.path.abspath(root)
+        self.lock = threading.Lock()
+        self.players = {}
+
+        os.makedirs(self.root, exist_ok=True)
+
+    @classmethod
+    def load(cls, root=Artifacts.root):
+        """
+            Загрузка хранилища по манифесту.
+        """
+
+        store = cls(root)
+        manifest_path = os.path.join(store.root, Artifacts.manifest)
+
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as manifest:
+                store.players = json.load(manifest)
+
+        return store
+
+    def entry_path(self, digest):
+        """
+            Каталог артефактов с заданным SHA-256 архива.
+        """
+
+        return os.path.join(self.root, digest)
+
+    def has_entry(self, digest):
+        """
+            Проверка, распакован ли уже архив с таким SHA-256.
+        """
+
+        return os.path.isdir(self.entry_path(digest))
+
+    def new_entry(self, digest):
+        """
+            Временный каталог для распаковки архива.
+            После распаковки переносится на место функцией commit_entry.
+        """
+
+        tmp_path = f"{self.entry_path(digest)}.{threading.get_ident()}.tmp"
+        os.makedirs(tmp_path, exist_ok=True)
+
+        return tmp_path
+
+    def commit_entry(self, digest, tmp_path):
+        """
+            Перенос распакованного архива в каталог хранилища.
+        """
+
+        try:
+            os.rename(tmp_path, self.entry_path(digest))
+        except OSError:
+            # Такой же архив уже распакован другим потоком.
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def add(self, player, digest):
+        """
+            Запись библиотек архива игрока в манифест.
+        """
+
+        libs = sorted(os.listdir(self.entry_path(digest)))
+
+        with self.lock:
+            player_libs = self.players.setdefault(player, {})
+            for lib in libs:
+                player_libs[lib] = digest
+            self.save()
+
+    def player_libs(self, player):
+        """
+            Копия записи манифеста игрока: библиотека -> SHA-256 архива.
+        """
+
+        with self.lock:
+            return dict(self.players.get(player, {}))
+
+    def update(self, player, libs):
+        """
+            Запись библиотек игрока, полученных из другого хранилища,
+            только в памяти, без записи манифеста.
+        """
+
+        self.players[player] = dict(libs)
+
+    def save(self):
+        """
+            Атомарная запись манифеста на диск.
+        """
+
+        manifest_path = os.path.join(self.root, Artifacts.manifest)
+        tmp_path = f"{manifest_path}.tmp"
+
+        with open(tmp_path, "w") as manifest:
+            json.dump(self.players, manifest, ensure_ascii=False, indent=1)
+
+        os.replace(tmp_path, manifest_path)
+
+    def lib_path(self, player, lib_name):
+        """
+            Полный путь к библиотеке игрока или "NULL", если её нет.
+        """
+
+        digest = self.players.get(player, {}).get(lib_name)
+
+        if digest is None:
+            return "NULL"
+
+        return os.path.join(self.entry_path(digest), lib_name)
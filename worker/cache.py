@@ -0,0 +1,190 @@
+"""
+    Модуль постоянного кэша метаданных GitLab.
+
+    Ответы на GET-запросы к API хранятся в SQLite вместе с ETag и Last-Modified.
+    Повторный запрос отправляется условным (If-None-Match / If-Modified-Since),
+    и на ответ 304 возвращается сохранённое тело. Группы, проекты, участники
+    и job'ы, которые не менялись, между запусками заново не передаются.
+"""
+
+
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from dataclasses import dataclass
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import worker.client
+
+
+@dataclass
+class Cache:
+    """
+        Константы кэша метаданных.
+    """
+    path = ".cache/gitlab_metadata.sqlite"
+
+    ok = 200
+    not_modified = 304
+
+
+class MetadataCache:
+    """
+        Хранилище ответов API в SQLite.
+    """
+
+    def __init__(self, path=Cache.path):
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+            "headers TEXT, body BLOB)"
+        )
+        self.conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+            Получение сохранённого ответа:
+            (etag, last_modified, headers, body) или None.
+        """
+
+        with self.lock:
+            return self.conn.execute(
+                "SELECT etag, last_modified, headers, body FROM responses WHERE key = ?",
+                (key, )
+            ).fetchone()
+
+    def put(self, key, etag, last_modified, headers, body):
+        """
+            Сохранение ответа.
+        """
+
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, etag, last_modified, json.dumps(headers), body)
+            )
+            self.conn.commit()
+
+    def count(self, hit):
+        """
+            Учёт попадания или промаха.
+        """
+
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def close(self):
+        """
+            Закрытие базы.
+        """
+
+        with self.lock:
+            self.conn.close()
+
+
+def cache_key(request):
+    """
+        Ключ ответа: URL запроса и хэш токена,
+        чтобы ответы разных пользователей не смешивались.
+    """
+
+    token = request.headers.get("PRIVATE-TOKEN", "") or \
+        request.headers.get("Authorization", "")
+    token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+    return f"{token_hash} {request.url}"
+
+
+def cached_response(request, cached, response):
+    """
+        Восстановление полного ответа из кэша по ответу 304.
+    """
+
+    restored = requests.Response()
+    restored.status_code = Cache.ok
+    restored.reason = "OK"
+    restored.headers = CaseInsensitiveDict(json.loads(cached[2]))
+    restored._content = cached[3]  # pylint: disable=protected-access
+    restored.encoding = requests.utils.get_encoding_from_headers(restored.headers)
+    restored.url = request.url
+    restored.request = request
+    restored.connection = response.connection
+    restored.elapsed = response.elapsed
+
+    return restored
+
+
+class CachingAdapter(worker.client.RetryingAdapter):
+    """
+        Транспорт requests с условными запросами и кэшем ответов.
+        Кэшируются только непотоковые GET-запросы с JSON-ответом,
+        поэтому архивы артефактов через кэш не проходят.
+        Пул соединений и повторы наследуются от RetryingAdapter.
+    """
+
+    def __init__(self, cache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request, stream=False, **kwargs):  # pylint: disable=arguments-differ
+        if request.method != "GET" or stream:
+            return super().send(request, stream=stream, **kwargs)
+
+        key = cache_key(request)
+        cached = self.cache.get(key)
+
+        if cached is not None:
+            if cached[0]:
+                request.headers["If-None-Match"] = cached[0]
+            if cached[1]:
+                request.headers["If-Modified-Since"] = cached[1]
+
+        response = super().send(request, stream=stream, **kwargs)
+
+        if response.status_code == Cache.not_modified and cached is not None:
+            self.cache.count(hit=True)
+            return cached_response(request, cached, response)
+
+        self.cache.count(hit=False)
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        if response.status_code == Cache.ok and (etag or last_modified) and \
+                response.headers.get("Content-Type", "").startswith("application/json"):
+            self.cache.put(key, etag, last_modified,
+                           dict(response.headers), response.content)
+
+        return response
+
+
+def install_cache(instance, path=Cache.path):
+    """
+        Подключение кэша метаданных к экземпляру GitLab.
+        Повторный вызов возвращает уже подключенный кэш.
+    """
+
+    if getattr(instance, "metadata_cache", None) is not None:
+        return instance.metadata_cache
+
+    cache = MetadataCache(path)
+    worker.client.configure_client(instance, CachingAdapter, cache=cache)
+    instance.metadata_cache = cache
+
+    return cache
@@ -0,0 +1,203 @@
+"""
+    Модуль настройки HTTP-клиента GitLab.
+
+    Все запросы repo и wiki идут через одну сессию экземпляра GitLab:
+    пул соединений фиксированного размера с keep-alive, повторы временных
+    ошибок (5xx, 429) с экспоненциальной задержкой со случайным разбросом
+    с учётом заголовков ограничения частоты, замеры задержек по эндпоинтам.
+"""
+
+
+import re
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from dataclasses import dataclass
+
+from requests import exceptions as req_exc
+from requests.adapters import HTTPAdapter
+
+
+@dataclass
+class Client:
+    """
+        Константы HTTP-клиента.
+    """
+    pool_size = 32
+
+    retries = 5
+    backoff_base = 0.5
+    backoff_cap = 30.0
+
+    rate_limited = 429
+    transient_statuses = (429, 500, 502, 503, 504)
+    idempotent_methods = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS")
+
+
+class LatencyMetrics:
+    """
+        Задержки запросов по эндпоинтам.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def record(self, endpoint, elapsed, failed):
+        """
+            Учёт одного запроса.
+        """
+
+        with self.lock:
+            stats = self.endpoints.setdefault(
+                endpoint, {"calls": 0, "total": 0.0, "max": 0.0, "errors": 0})
+            stats["calls"] += 1
+            stats["total"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+            stats["errors"] += int(failed)
+
+    def report(self):
+        """
+            Печать задержек, начиная с самых затратных эндпоинтов.
+        """
+
+        with self.lock:
+            endpoints = sorted(self.endpoints.items(),
+                               key=lambda item: item[1]["total"], reverse=True)
+
+        for endpoint, stats in endpoints:
+            print(f"ENDPOINT: {endpoint} "
+                  f"CALLS: {stats['calls']} "
+                  f"MEAN: {stats['total'] / stats['calls']:.3f}s "
+                  f"MAX: {stats['max']:.3f}s "
+                  f"ERRORS: {stats['errors']}")
+
+
+def endpoint_name(request):
+    """
+        Имя эндпоинта: метод и путь без параметров и числовых id.
+    """
+
+    path = request.path_url.split("?")[0]
+
+    return f"{request.method} {re.sub(r'/[0-9]+(?=/|$)', '/:id', path)}"
+
+
+def backoff_delay(attempt):
+    """
+        Экспоненциальная задержка со случайным разбросом (full jitter).
+    """
+
+    return random.uniform(0, min(Client.backoff_cap, Client.backoff_base * 2 ** attempt))
+
+
+def retry_delay(response, attempt):
+    """
+        Задержка перед повтором: по Retry-After или RateLimit-Reset,
+        если сервер их прислал, иначе экспоненциальная.
+    """
+
+    retry_after = response.headers.get("Retry-After")
+
+    if retry_after is not None:
+        if retry_after.isdigit():
+            return min(Client.backoff_cap, float(retry_after))
+        try:
+            delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            return min(Client.backoff_cap, max(0.0, delay))
+        except (TypeError, ValueError):
+            pass
+
+    reset = response.headers.get("RateLimit-Reset")
+
+    if reset is not None and reset.isdigit():
+        return min(Client.backoff_cap, max(0.0, int(reset) - time.time()))
+
+    return backoff_delay(attempt)
+
+
+def should_retry(request, status):
+    """
+        Можно ли повторить запрос с таким статусом ответа.
+        Неидемпотентные запросы повторяются только при ограничении частоты.
+    """
+
+    if status not in Client.transient_statuses:
+        return False
+
+    return request.method in Client.idempotent_methods or status == Client.rate_limited
+
+
+class RetryingAdapter(HTTPAdapter):
+    """
+        Транспорт requests с пулом соединений, повторами и замерами задержек.
+    """
+
+    def __init__(self, metrics=None, **kwargs):
+        kwargs.setdefault("pool_connections", Client.pool_size)
+        kwargs.setdefault("pool_maxsize", Client.pool_size)
+        super().__init__(**kwargs)
+        self.metrics = metrics or LatencyMetrics()
+
+    def send(self, request, stream=False, **kwargs):  # pylint: disable=arguments-differ
+        endpoint = endpoint_name(request)
+
+        for attempt in range(Client.retries + 1):
+            start = time.perf_counter()
+
+            try:
+                response = super().send(request, stream=stream, **kwargs)
+            except (req_exc.ConnectionError, req_exc.Timeout):
+                self.metrics.record(endpoint, time.perf_counter() - start, True)
+                if attempt == Client.retries or request.method not in Client.idempotent_methods:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            failed = response.status_code >= 400
+            self.metrics.record(endpoint, time.perf_counter() - start, failed)
+
+            if attempt == Client.retries or not should_retry(request, response.status_code):
+                return response
+
+            delay = retry_delay(response, attempt)
+            response.close()
+            print(f"{endpoint} RETURNED {response.status_code}, "
+                  f"RETRY IN {delay:.1f}s")
+            time.sleep(delay)
+
+        return response
+
+
+def configure_client(instance, adapter_cls=RetryingAdapter, **adapter_kwargs):
+    """
+        Подключение настроенного транспорта к сессии экземпляра GitLab.
+        Собственные повторы python-gitlab при 429 отключаются: их уже делает
+        транспорт, и иначе каждый запрос повторялся бы дважды вложенными циклами.
+        Повторный вызов возвращает уже подключенные метрики.
+    """
+
+    if getattr(instance, "client_metrics", None) is not None:
+        return instance.client_metrics
+
+    adapter = adapter_cls(**adapter_kwargs)
+
+    instance.session.mount("https://", adapter)
+    instance.session.mount("http://", adapter)
+    instance.session.headers["Connection"] = "keep-alive"
+    instance.client_metrics = adapter.metrics
+
+    http_request = instance.http_request
+
+    def adapter_retried_request(*args, **kwargs):
+        """
+            Запрос к API без повторов python-gitlab.
+        """
+
+        kwargs.setdefault("obey_rate_limit", False)
+        return http_request(*args, **kwargs)
+
+    instance.http_request = adapter_retried_request
+
+    return adapter.metrics
@@ -0,0 +1,77 @@
+"""
+    Модуль доверительного интервала времени работы стратегии.
+"""
+
+
+from math import inf
+
+
+def bound_repr(bound):
+    """
+        Запись границы интервала на Wiki-странице.
+    """
+
+    if bound == inf:
+        return "+inf"
+    if bound == -inf:
+        return "-inf"
+
+    return repr(bound)
+
+
+class TimeInterval:
+    """
+        Замкнутый интервал [lower, upper] с признаком отсутствия результата.
+        Сравнение как у отрезков: a < b, если a целиком левее b,
+        a > b, если a целиком правее b.
+    """
+
+    __slots__ = ("lower", "upper", "no_result")
+
+    def __init__(self, lower, upper, no_result=False):
+        self.lower = lower
+        self.upper = upper
+        self.no_result = no_result
+
+    @classmethod
+    def missing(cls, lower):
+        """
+            Интервал стратегии без результата: [lower, +inf].
+        """
+
+        return cls(lower, inf, True)
+
+    def overlaps(self, other):
+        """
+            Пересекаются ли интервалы.
+        """
+
+        return self.lower <= other.upper and other.lower <= self.upper
+
+    def __lt__(self, other):
+        return self.upper < other.lower
+
+    def __gt__(self, other):
+        return self.lower > other.upper
+
+    def __eq__(self, other):
+        if not isinstance(other, TimeInterval):
+            return NotImplemented
+
+        return (self.lower, self.upper, self.no_result) == \
+            (other.lower, other.upper, other.no_result)
+
+    def __hash__(self):
+        return hash((self.lower, self.upper, self.no_result))
+
+    def __getstate__(self):
+        return (self.lower, self.upper, self.no_result)
+
+    def __setstate__(self, state):
+        self.lower, self.upper, self.no_result = state
+
+    def __repr__(self):
+        if self.lower == self.upper:
+            return f"[{bound_repr(self.lower)}]"
+
+        return f"[{bound_repr(self.lower)},{bound_repr(self.upper)}]"
@@ -0,0 +1,95 @@
+"""
+    Модуль расчёта мест в таблицах результатов.
+"""
+
+
+import operator
+import itertools
+
+
+def rank_index(players):
+    """
+        Индекс таблицы: имя игрока -> первое место, на котором он стоит.
+    """
+
+    index = {}
+
+    for position, player in enumerate(players):
+        index.setdefault(player, position)
+
+    return index
+
+
+def rank_diff(old_players, new_players):
+    """
+        Изменение мест игроков между прошлой и новой таблицей за один проход.
+
+        Возвращает пару (сдвиги, выбывшие):
+        сдвиги - для каждой строки новой таблицы старое место минус новое
+        (положительный - игрок поднялся) или None, если игрока раньше не было;
+        выбывшие - игроки прошлой таблицы, которых нет в новой: имя -> старое место.
+    """
+
+    old_index = rank_index(old_players)
+    new_index = rank_index(new_players)
+
+    shifts = [old_index[player] - position if player in old_index else None
+              for position, player in enumerate(new_players)]
+    dropped = {player: position for player, position in old_index.items()
+               if player not in new_index}
+
+    return shifts, dropped
+
+
+def interval_order(intervals, times):
+    """
+        Порядок отрезков [lower, upper]: отрезок, целиком лежащий левее другого,
+        всегда выше него, а из двух пересекающихся выше тот, у кого время сборки меньше.
+        Отрезки перебираются по левой границе, и каждый следующий поднимается
+        над соседями сверху, пока пересекается с ними и собран раньше них.
+        Если пересечения нетранзитивны и оба правила выполнить нельзя,
+        сохраняется порядок по положению.
+    """
+
+    order = []
+
+    for ind in sorted(range(len(intervals)), key=lambda ind: intervals[ind].lower):
+        place = len(order)
+
+        while place and intervals[order[place - 1]].overlaps(intervals[ind]) \
+                and times[order[place - 1]] > times[ind]:
+            place -= 1
+
+        order.insert(place, ind)
+
+    return order
+
+
+def timedep_sort(results, status_col, res_col, time_col):
+    """
+        Порядок игр на время: сначала по статусу тестов, затем по доверительному
+        интервалу времени (меньше - выше), а среди пересекающихся интервалов
+        выше тот, чья стратегия собрана раньше.
+    """
+
+    ranked = []
+
+    for _, group in itertools.groupby(sorted(results, key=operator.itemgetter(status_col)),
+                                      key=operator.itemgetter(status_col)):
+        group = list(group)
+        order = interval_order([rec[res_col] for rec in group],
+                               [rec[time_col] for rec in group])
+        ranked.extend(group[ind] for ind in order)
+
+    return ranked
+
+
+def timedepless_sort(results, res_col, time_col):
+    """
+        Порядок игр на очки: больше очков - выше, при равных очках
+        выше стратегия, собранная позже.
+    """
+
+    results = sorted(results, key=operator.itemgetter(time_col), reverse=True)
+
+    return sorted(results, key=operator.itemgetter(res_col), reverse=True)
@@ -4,12 +4,22 @@
 
 
 import os
-import subprocess
+import shutil
 import hashlib
+import zipfile
+import threading
+from fnmatch import fnmatch
+from functools import lru_cache
+from urllib.parse import quote
+from time import perf_counter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import gitlab
+from gitlab.v4.objects import Project
 
 from dateutil import parser
 from dataclasses import dataclass
+import worker.artifacts
 
 @dataclass
 class Repo:
@@ -19,6 +29,100 @@ class Repo:
     collected = 1
     bad_call = 2
 
+    # Не больше размера пула соединений worker.client.Client.pool_size.
+    collect_workers = 16
+
+    jobs_per_page = 100
+
+    lib_patterns = ("*_lib.so", )
+    dump_patterns = ("*.json", "*.sqlite", "tbdump_*.obj")
+    spool_size = 32 * 1024 * 1024
+
+
+JOBS_CACHE = {}
+JOBS_LOCK = threading.Lock()
+
+
+class StageTimings:
+    """
+        Суммарное время этапов сбора артефактов по всем проектам.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {}
+        self.counts = {}
+
+    @contextmanager
+    def stage(self, name):
+        """
+            Замер времени одного этапа.
+        """
+
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            with self.lock:
+                self.totals[name] = self.totals.get(name, 0.0) + elapsed
+                self.counts[name] = self.counts.get(name, 0) + 1
+
+    def report(self, wall_time):
+        """
+            Печать времени этапов.
+        """
+
+        print(f"COLLECTION TIME: {wall_time:.2f}s")
+        for name, total in self.totals.items():
+            print(f"STAGE: {name} TOTAL: {total:.2f}s "
+                  f"CALLS: {self.counts[name]} "
+                  f"MEAN: {total / self.counts[name]:.3f}s")
+
+
+class ApiCounter:
+    """
+        Счётчик запросов к API GitLab.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def increment(self):
+        """
+            Учёт одного запроса.
+        """
+
+        with self.lock:
+            self.calls += 1
+
+
+def count_api_calls(instance):
+    """
+        Подключение счётчика ко всем запросам экземпляра GitLab.
+        Повторный вызов возвращает уже подключенный счётчик.
+    """
+
+    if getattr(instance, "api_counter", None) is not None:
+        return instance.api_counter
+
+    counter = ApiCounter()
+    http_request = instance.http_request
+
+    def counted_request(*args, **kwargs):
+        """
+            Запрос к API с учётом в счётчике.
+        """
+
+        counter.increment()
+        return http_request(*args, **kwargs)
+
+    instance.http_request = counted_request
+    instance.api_counter = counter
+
+    return counter
+
 
 def get_group(instance, name):
     """
@@ -27,7 +131,7 @@ def get_group(instance, name):
 
     group = None
 
-    groups = instance.groups.list(all=True)
+    groups = instance.groups.list(search=name, all=True)
     for grp in groups:
         if grp.name == name:
             group = grp
@@ -41,42 +145,85 @@ def get_group_projects(instance, group):
         Получение GitLab-проектов внутри группы.
     """
 
-    group = instance.groups.get(group.id)
+    group = instance.groups.get(group.id, lazy=True)
     projects = group.projects.list(all=True)
 
     return projects
 
 
-def get_project(instance, group, name):
+def project_handle(instance, prj):
     """
-        Получение GitLab-проекта по имени проекта.
+        Создание полноценного GitLab-проекта из записи списка проектов группы
+        без отдельного запроса к API.
     """
 
-    project = None
+    return Project(instance.projects, prj.attributes)
 
-    projects = get_group_projects(instance, group)
-    for prj in projects:
-        if prj.name == name:
-            project = instance.projects.get(prj.id)
+
+def find_job(project, ref, name=None):
+    """
+        Поиск последнего успешного job'а в ветке (и с заданным именем).
+        Job'ы запрашиваются с фильтром по статусу лениво, страница за страницей,
+        поиск останавливается на первом совпадении.
+        Результат запоминается на время запуска по (проект, ветка, имя).
+    """
+
+    key = (project.id, ref, name)
+
+    with JOBS_LOCK:
+        if key in JOBS_CACHE:
+            return JOBS_CACHE[key]
+
+    found_job = None
+
+    jobs = project.jobs.list(scope="success", per_page=Repo.jobs_per_page, as_list=False)
+    for job in jobs:
+        if job.ref == ref and (name is None or job.name == name):
+            found_job = job
             break
 
-    return project
+    with JOBS_LOCK:
+        JOBS_CACHE[key] = found_job
+
+    return found_job
 
 
-def get_success_job(project, ref):
+def find_success_jobs(project, refs):
     """
-        Получение последнего успешного job'а в ветке.
+        Поиск последних успешных job'ов сразу в нескольких ветках
+        за один проход по списку job'ов проекта.
+        Возвращает словарь ветка -> job или None.
     """
 
-    success_job = None
+    found = {}
+    missing = []
 
-    jobs = project.jobs.list(all=True)
+    with JOBS_LOCK:
+        for ref in refs:
+            if (project.id, ref, None) in JOBS_CACHE:
+                found[ref] = JOBS_CACHE[(project.id, ref, None)]
+            else:
+                missing.append(ref)
+
+    if not missing:
+        return found
+
+    fresh = dict.fromkeys(missing)
+
+    jobs = project.jobs.list(scope="success", per_page=Repo.jobs_per_page, as_list=False)
     for job in jobs:
-        if job.ref == ref and job.status == "success":
-            success_job = job
-            break
+        if job.ref in fresh and fresh[job.ref] is None:
+            fresh[job.ref] = job
+            if all(fresh.values()):
+                break
+
+    with JOBS_LOCK:
+        for ref, job in fresh.items():
+            JOBS_CACHE[(project.id, ref, None)] = job
 
-    return success_job
+    found.update(fresh)
+
+    return found
 
 
 def get_deploy_job(project, game, ref):
@@ -84,15 +231,7 @@ def get_deploy_job(project, game, ref):
         Получение job'а со статусом "deploy".
     """
 
-    deploy_job = None
-
-    jobs = project.jobs.list(all=True)
-    for job in jobs:
-        if job.ref == ref and job.status == "success"and job.name == f"deploy_{game}":
-            deploy_job = job
-            break
-
-    return deploy_job
+    return find_job(project, ref, f"deploy_{game}")
 
 
 def get_job_date(job):
@@ -111,102 +250,317 @@ def get_job_date(job):
     return parser.parse(job_status, dayfirst=True)
 
 
+@lru_cache(maxsize=None)
+def master_md5(master):
+    """
+        md5-сумма файла в основном репозитории, считается один раз за запуск.
+    """
+
+    with open(master, "rb") as master_file:
+        return hashlib.md5(master_file.read()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def master_blob_id(master):
+    """
+        SHA-1 git-blob'а файла в основном репозитории,
+        считается один раз за запуск.
+    """
+
+    with open(master, "rb") as master_file:
+        content = master_file.read()
+
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def user_blob_id(project, ref, user):
+    """
+        SHA-1 git-blob'а файла в репозитории пользователя.
+        Запрашиваются только метаданные файла (HEAD), без содержимого.
+    """
+
+    path = f"/projects/{project.id}/repository/files/{quote(user, safe='')}"
+    response = project.manager.gitlab.http_request(
+        "head", path, query_data={"ref": ref})
+
+    return response.headers.get("X-Gitlab-Blob-Id")
+
+
 def check_md5(master, project, ref, user):
     """
         Проверка md5-суммы файла в репозитории пользователя
         с файлом в основном репозитории.
     """
 
-    master_file = open(master, "rt").read()
-    master_md5 = hashlib.md5(master_file.encode("utf-8")).hexdigest()
     user_file = project.files.get(file_path=user, ref=ref)
     user_md5 = hashlib.md5(user_file.decode()).hexdigest()
 
-    if master_md5 != user_md5:
+    if master_md5(master) != user_md5:
         return False
 
     return True
 
 
-def get_artifacts(project, job):
+def check_ci(master, project, ref, user):
+    """
+        Проверка, совпадает ли файл в репозитории пользователя
+        с файлом в основном репозитории.
+        Сравниваются SHA-1 git-blob'ов, поэтому содержимое файла не скачивается.
+        Если GitLab не вернул blob id, файл сравнивается по md5-сумме.
+    """
+
+    try:
+        blob_id = user_blob_id(project, ref, user)
+    except (gitlab.exceptions.GitlabHttpError, gitlab.exceptions.GitlabGetError):
+        return False
+
+    if blob_id is None:
+        return check_md5(master, project, ref, user)
+
+    return blob_id == master_blob_id(master)
+
+
+def download_artifacts(job, buffer, sha=None):
+    """
+        Потоковое скачивание архива артефактов job'ы в буфер.
+        Если передан sha, по ходу скачивания считается хэш архива.
+    """
+
+    def write(chunk):
+        """
+            Запись очередной части архива.
+        """
+
+        if sha is not None:
+            sha.update(chunk)
+        buffer.write(chunk)
+
+    job.artifacts(streamed=True, action=write)
+    buffer.seek(0)
+
+
+def extract_artifacts(buffer, dest, patterns):
+    """
+        Распаковка из архива только файлов, подходящих под шаблоны,
+        в каталог dest. Возвращает пути распакованных файлов.
+    """
+
+    extracted = []
+
+    with zipfile.ZipFile(buffer) as archive:
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+
+            if info.is_dir() or not any(fnmatch(name, ptrn) for ptrn in patterns):
+                continue
+
+            path = os.path.join(dest, name)
+            with archive.open(info) as src, open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            extracted.append(path)
+
+    return extracted
+
+
+def get_artifacts(job, timings=None, patterns=Repo.lib_patterns, dest="."):
     """
         Получение артефактов job'ы.
+        Архив не сохраняется на диск целиком: он скачивается в буфер,
+        который уходит во временный файл только после Repo.spool_size байт.
     """
 
-    job = project.jobs.get(job.id)
-    zip_arts = job.user.get("username") + ".zip"
+    timings = timings or StageTimings()
 
     try:
-        with open(zip_arts, "wb") as file:
-            job.artifacts(streamed=True, action=file.write)
+        with worker.artifacts.SpooledBuffer(max_size=Repo.spool_size) as buffer:
+            with timings.stage("DOWNLOAD"):
+                download_artifacts(job, buffer)
+            with timings.stage("EXTRACT"):
+                extract_artifacts(buffer, dest, patterns)
+    except (gitlab.exceptions.GitlabGetError, zipfile.BadZipFile):
+        return Repo.bad_call
 
-        subprocess.run(["unzip", "-qo", zip_arts], check=True)
-    except (gitlab.exceptions.GitlabGetError, subprocess.CalledProcessError):
+    return Repo.collected
+
+
+def store_artifacts(job, store, player, timings=None):
+    """
+        Получение артефактов job'ы в хранилище артефактов.
+        Библиотеки распаковываются в каталог, названный по SHA-256 архива,
+        уже распакованный архив повторно не распаковывается.
+    """
+
+    timings = timings or StageTimings()
+    sha = hashlib.sha256()
+
+    try:
+        with worker.artifacts.SpooledBuffer(max_size=Repo.spool_size) as buffer:
+            with timings.stage("DOWNLOAD"):
+                download_artifacts(job, buffer, sha)
+
+            digest = sha.hexdigest()
+
+            if not store.has_entry(digest):
+                with timings.stage("EXTRACT"):
+                    tmp_path = store.new_entry(digest)
+                    try:
+                        extract_artifacts(buffer, tmp_path, Repo.lib_patterns)
+                    except zipfile.BadZipFile:
+                        shutil.rmtree(tmp_path, ignore_errors=True)
+                        raise
+                    store.commit_entry(digest, tmp_path)
+    except (gitlab.exceptions.GitlabGetError, zipfile.BadZipFile):
         return Repo.bad_call
 
-    os.unlink(zip_arts)
+    store.add(player, digest)
 
     return Repo.collected
 
 
-def get_group_artifacts(instance, game, group_name):
+def get_developer(project, group_name):
+    """
+        Получение разработчика проекта.
+        В практикантской группе у проекта несколько разработчиков,
+        они объединяются в одну запись.
+    """
+
+    members = project.members.list(all=True)
+
+    members_list = [mmbr for mmbr in members
+                    if mmbr.access_level == gitlab.DEVELOPER_ACCESS]
+
+    if not members_list:
+        return None
+
+    developer = members_list[0]
+
+    if group_name == "iu7-bachelors-2023-practice-2020-iu7games":
+        developer.name = project.name[len(group_name) + 1:]
+        username = ""
+        for member in members_list:
+            username += f"@{member.username}, "
+        developer.username = username[:-2]
+    else:
+        developer.username = f"@{developer.username}"
+
+    return developer
+
+
+def collect_project(instance, games, group, ind, prj, timings, store):
+    """
+        Сбор артефактов одного проекта группы со всех веток games:
+        метаданные -> проверка CI -> скачивание -> распаковка.
+        Возвращает словарь ветка -> запись игрока для веток с успешным job'ом.
+    """
+
+    with timings.stage("METADATA"):
+        project = project_handle(instance, prj)
+        jobs = {game: job for game, job in find_success_jobs(project, games).items()
+                if job is not None}
+
+        for game in games:
+            if game not in jobs:
+                print(f"THERE ARE NO OK JOBS FOR {game} BRANCH IN {project.name}")
+
+        if not jobs:
+            return {}
+
+        developer = get_developer(project, group.name)
+
+    if developer is None:
+        print(f"THERE IS NO DEVELOPER FOR {project.name}")
+        return {}
+
+    user_results = {}
+
+    for game in games:
+        if game not in jobs:
+            continue
+
+        user_result = [str(ind), developer.name, developer.username,
+                       get_job_date(jobs[game])]
+        user_results[game] = user_result
+
+        with timings.stage("CI CHECK"):
+            correct_ci = check_ci(os.path.abspath("cfg/.gitlab-ci.students.yml"),
+                                  project, game, ".gitlab-ci.yml")
+
+        if correct_ci is False:
+            print(f"CORRUPTED CI FOUND FOR {user_result[2]} IN {game}")
+            continue
+
+        print(f"CORRECT CI FOUND FOR {user_result[2]} IN {game}")
+        status = store_artifacts(jobs[game], store, user_result[2], timings)
+
+        if status == Repo.collected:
+            print(f"{game} ARTIFACTS FOR {user_result[2]} ARE COLLECTED")
+        elif status == Repo.bad_call:
+            print(f"THERE ARE NO {game} ARTIFACTS FOR {user_result[2]}")
+
+    return user_results
+
+
+def collect_group(instance, games, group_name, store=None, on_collected=None):
     """
-        Получение артефактов со всех проектов группы из определенной ветки.
+        Получение артефактов со всех проектов группы из веток games
+        в хранилище артефактов store.
+        Проекты обрабатываются параллельно, каждый проходит все этапы
+        сбора независимо от остальных. Запись каждого обработанного игрока
+        сразу передаётся в on_collected(ветка, запись), не дожидаясь остальных.
+        Возвращает словарь ветка -> записи игроков.
     """
 
+    store = store or worker.artifacts.ArtifactStore()
+
+    start = perf_counter()
+    timings = StageTimings()
+    counter = count_api_calls(instance)
+    calls_before = counter.calls
+
     group = get_group(instance, group_name)
     projects = get_group_projects(instance, group)
 
-    results = []
+    results = {game: [] for game in games}
 
     print("START ARTIFACTS COLLECTION")
 
-    for ind, prj in enumerate(projects):
-        project = get_project(instance, group, prj.name)
-        job = get_success_job(project, game)
+    with ThreadPoolExecutor(max_workers=Repo.collect_workers) as executor:
+        futures = [
+            executor.submit(collect_project, instance, games, group, ind, prj, timings, store)
+            for ind, prj in enumerate(projects)
+        ]
 
-        if job is None:
-            print(f"THERE ARE NO OK JOBS FOR {game} BRANCH IN {project.name}")
-            continue
+        for future in as_completed(futures):
+            for game, user_result in future.result().items():
+                results[game].append(user_result)
+                if on_collected is not None:
+                    on_collected(game, user_result)
 
-        developer = None
-        members = project.members.list(all=True)
-
-        members_list = []
-
-        for mmbr in members:
-            member = project.members.get(mmbr.id)
-            if member.access_level == gitlab.DEVELOPER_ACCESS:
-                members_list.append(member)
-
-        if group_name == "iu7-bachelors-2023-practice-2020-iu7games":
-            developer = members_list[0]
-            developer.name = project.name[len(group_name) + 1:]
-            username = ""
-            for member in members_list:
-                username += f"@{member.username}, "
-            developer.username = username[:-2]
-        else:
-            developer = members_list[0]
-            developer.username = f"@{developer.username}"
-
-        if developer is not None:
-            user_result = [str(ind), developer.name, developer.username, get_job_date(job)]
-            results.append(user_result)
-            if check_md5(os.path.abspath("cfg/.gitlab-ci.students.yml"),
-                         project, game, ".gitlab-ci.yml") is False:
-                print(f"CORRUPTED CI FOUND FOR {user_result[2]}")
-                continue
-            print(f"CORRECT CI FOUND FOR {user_result[2]}")
-            status = get_artifacts(project, job)
+    for game_results in results.values():
+        game_results.sort(key=lambda rec: int(rec[0]))
 
-            if status == Repo.collected:
-                print(f"ARTIFACTS FOR {user_result[2]} ARE COLLECTED")
-            elif status == Repo.bad_call:
-                print(f"THERE ARE NO ARTIFACTS FOR {user_result[2]}")
-        else:
-            print(f"THERE IS NO DEVELOPER FOR {project.name}")
+    print("FINISH ARTIFACTS COLLECTION")
+    timings.report(perf_counter() - start)
+    print(f"API CALLS: {counter.calls - calls_before}")
 
-    print("FINISH ARTIFACTS COLLECTION\n")
+    cache = getattr(instance, "metadata_cache", None)
+    if cache is not None:
+        print(f"METADATA CACHE HITS: {cache.hits} MISSES: {cache.misses}")
+    print()
 
     return results
+
+
+def get_group_artifacts(instance, game, group_name, store=None, on_collected=None):
+    """
+        Получение артефактов со всех проектов группы из одной ветки.
+        Запись каждого обработанного игрока сразу передаётся в on_collected.
+    """
+
+    if on_collected is not None:
+        results = collect_group(instance, (game, ), group_name, store,
+                                lambda _, user_result: on_collected(user_result))
+    else:
+        results = collect_group(instance, (game, ), group_name, store)
+
+    return results[game]
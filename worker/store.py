@@ -0,0 +1,354 @@
+"""
+    Модуль хранилища результатов турниров.
+
+    Таблицы результатов хранятся в SQLite: каждый запуск записывается
+    отдельно с датой, строки таблицы индексированы по игроку, игре и дивизиону.
+    Прошлые очки дивизиона читаются одним запросом по индексу,
+    а история игрока доступна без загрузки всех таблиц.
+    Аппаратные счётчики стратегий в играх на время хранятся
+    в отдельной таблице по событиям, выбывшие из таблицы игроки -
+    в таблице dropped вместе с местом в прошлом запуске.
+"""
+
+
+import os
+import glob
+import json
+import pickle
+import sqlite3
+from datetime import datetime
+from dataclasses import dataclass
+
+
+@dataclass
+class Store:
+    """
+        Константы хранилища результатов.
+    """
+    path = "results.sqlite"
+    schema_version = 3
+    timeout = 30
+
+    legacy_dumps = "tbdump_*.obj"
+
+    name_col = 1
+    gitlab_id_col = 2
+    score_col = 3
+    counters_col = 6
+
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS runs ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, game TEXT NOT NULL, "
+    "division TEXT NOT NULL, created_at TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS runs_by_division ON runs (game, division, id)",
+    "CREATE INDEX IF NOT EXISTS runs_by_date ON runs (game, division, created_at)",
+    "CREATE TABLE IF NOT EXISTS standings ("
+    "run_id INTEGER NOT NULL REFERENCES runs (id), position INTEGER NOT NULL, "
+    "player TEXT NOT NULL, gitlab_id TEXT, score NUMERIC, record TEXT NOT NULL, "
+    "PRIMARY KEY (run_id, position))",
+    "CREATE INDEX IF NOT EXISTS standings_by_player ON standings (player, run_id)",
+    "CREATE TABLE IF NOT EXISTS counters ("
+    "run_id INTEGER NOT NULL REFERENCES runs (id), position INTEGER NOT NULL, "
+    "event TEXT NOT NULL, value REAL NOT NULL, "
+    "PRIMARY KEY (run_id, position, event))",
+    "CREATE TABLE IF NOT EXISTS dropped ("
+    "run_id INTEGER NOT NULL REFERENCES runs (id), player TEXT NOT NULL, "
+    "position INTEGER NOT NULL, PRIMARY KEY (run_id, player))",
+)
+
+
+class LegacyUnpickler(pickle.Unpickler):
+    """
+        Загрузка tbdump-файлов из артефактов deploy job'а:
+        из классов разрешён только TimeInterval, остальные не импортируются.
+    """
+
+    allowed = {("worker.interval", "TimeInterval")}
+
+    def find_class(self, module, name):
+        if (module, name) not in self.allowed:
+            raise pickle.UnpicklingError(f"{module}.{name} IS NOT ALLOWED")
+
+        return super().find_class(module, name)
+
+
+def division_key(game, compet):
+    """
+        Ключ таблицы: имя игры в нижнем регистре и дивизион без подчёркивания.
+    """
+
+    return game.lower(), compet.lstrip("_")
+
+
+def serialize_record(rec):
+    """
+        Строка таблицы в JSON: значения, не представимые в JSON,
+        сохраняются в том виде, в каком попадают на Wiki-страницу.
+    """
+
+    return json.dumps(
+        [val if val is None or isinstance(val, (bool, int, float, str, dict)) else str(val)
+         for val in rec],
+        ensure_ascii=False
+    )
+
+
+def record_score(rec):
+    """
+        Очки игрока из строки таблицы или None, если очков в строке нет.
+    """
+
+    if len(rec) <= Store.score_col:
+        return None
+
+    score = rec[Store.score_col]
+
+    if isinstance(score, bool) or not isinstance(score, (int, float)):
+        return None
+
+    return score
+
+
+def record_counters(rec):
+    """
+        Аппаратные счётчики из строки таблицы: событие -> среднее на вызов.
+    """
+
+    if len(rec) <= Store.counters_col or not isinstance(rec[Store.counters_col], dict):
+        return {}
+
+    return rec[Store.counters_col]
+
+
+class ResultsStore:
+    """
+        Хранилище таблиц результатов с историей запусков.
+    """
+
+    def __init__(self, path=Store.path):
+        self.conn = sqlite3.connect(path, timeout=Store.timeout)
+
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > Store.schema_version:
+            raise RuntimeError(
+                f"{path} HAS SCHEMA VERSION {version}, "
+                f"SUPPORTED UP TO {Store.schema_version}")
+
+        if version < Store.schema_version:
+            with self.conn:
+                for statement in SCHEMA:
+                    self.conn.execute(statement)
+                self.conn.execute(f"PRAGMA user_version = {Store.schema_version}")
+
+    def close(self):
+        """
+            Закрытие базы.
+        """
+
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def save_run(self, game, compet, records, created_at=None, dropped=None):
+        """
+            Запись таблицы результатов нового запуска.
+            dropped - игроки прошлого запуска, которых нет в этом: имя -> прошлое место.
+            Возвращает id запуска.
+        """
+
+        game, division = division_key(game, compet)
+        created_at = created_at or datetime.now()
+
+        with self.conn:
+            run_id = self.conn.execute(
+                "INSERT INTO runs (game, division, created_at) VALUES (?, ?, ?)",
+                (game, division, created_at.isoformat(timespec="seconds"))
+            ).lastrowid
+            self.conn.executemany(
+                "INSERT INTO standings VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, position, rec[Store.name_col], rec[Store.gitlab_id_col],
+                  record_score(rec), serialize_record(rec))
+                 for position, rec in enumerate(records)]
+            )
+            self.conn.executemany(
+                "INSERT INTO counters VALUES (?, ?, ?, ?)",
+                [(run_id, position, event, value)
+                 for position, rec in enumerate(records)
+                 for event, value in record_counters(rec).items()]
+            )
+            self.conn.executemany(
+                "INSERT INTO dropped VALUES (?, ?, ?)",
+                [(run_id, player, position) for player, position in (dropped or {}).items()]
+            )
+
+        return run_id
+
+    def latest_run(self, game, compet):
+        """
+            id последнего по дате запуска в дивизионе или None.
+            Запуски, перенесённые из других баз, могут получить id больше,
+            чем у более поздних локальных запусков, поэтому порядок задаёт дата.
+        """
+
+        row = self.conn.execute(
+            "SELECT id FROM runs WHERE game = ? AND division = ? "
+            "ORDER BY created_at DESC, id DESC LIMIT 1",
+            division_key(game, compet)
+        ).fetchone()
+
+        return row[0] if row else None
+
+    def previous_scores(self, game, compet):
+        """
+            Очки игроков в последнем запуске дивизиона: имя -> очки.
+        """
+
+        return dict(self.conn.execute(
+            "SELECT player, score FROM standings "
+            "WHERE run_id = ? AND score IS NOT NULL ORDER BY position",
+            (self.latest_run(game, compet), )
+        ))
+
+    def previous_players(self, game, compet):
+        """
+            Имена игроков последнего запуска дивизиона в порядке мест.
+        """
+
+        return [player for player, in self.conn.execute(
+            "SELECT player FROM standings WHERE run_id = ? ORDER BY position",
+            (self.latest_run(game, compet), )
+        )]
+
+    def previous_counters(self, game, compet):
+        """
+            Аппаратные счётчики игроков в последнем запуске дивизиона:
+            имя -> {событие: среднее на вызов}.
+        """
+
+        counters = {}
+
+        for player, event, value in self.conn.execute(
+                "SELECT standings.player, counters.event, counters.value "
+                "FROM counters JOIN standings ON standings.run_id = counters.run_id "
+                "AND standings.position = counters.position "
+                "WHERE counters.run_id = ? ORDER BY counters.position",
+                (self.latest_run(game, compet), )):
+            counters.setdefault(player, {})[event] = value
+
+        return counters
+
+    def previous_dropped(self, game, compet):
+        """
+            Игроки, выбывшие из таблицы в последнем запуске дивизиона:
+            имя -> место в запуске перед ним.
+        """
+
+        return dict(self.conn.execute(
+            "SELECT player, position FROM dropped WHERE run_id = ? ORDER BY position",
+            (self.latest_run(game, compet), )
+        ))
+
+    def player_history(self, game, compet, player):
+        """
+            История игрока в дивизионе: список (дата запуска, место, очки).
+        """
+
+        game, division = division_key(game, compet)
+
+        return [
+            (datetime.fromisoformat(created_at), position, score)
+            for created_at, position, score in self.conn.execute(
+                "SELECT runs.created_at, standings.position, standings.score "
+                "FROM standings JOIN runs ON runs.id = standings.run_id "
+                "WHERE standings.player = ? AND runs.game = ? AND runs.division = ? "
+                "ORDER BY runs.created_at, runs.id",
+                (player, game, division)
+            )
+        ]
+
+    def import_dumps(self, pattern=Store.legacy_dumps):
+        """
+            Перенос таблиц из старых tbdump-файлов в дивизионы, где ещё нет запусков.
+        """
+
+        for dump_path in sorted(glob.glob(pattern)):
+            name = os.path.basename(dump_path)[len("tbdump_"):-len(".obj")]
+            game, _, division = name.partition("_")
+
+            if self.latest_run(game, division) is not None:
+                continue
+
+            try:
+                with open(dump_path, "rb") as results_dump:
+                    records = LegacyUnpickler(results_dump).load()
+            except pickle.UnpicklingError as error:
+                # Например, таблицы игр на время до перехода на TimeInterval
+                # хранят объекты python-intervals.
+                print(f"{dump_path} SKIPPED: {error}")
+                continue
+
+            self.save_run(game, division, records,
+                          datetime.fromtimestamp(os.path.getmtime(dump_path)))
+            print(f"{dump_path} IMPORTED INTO {Store.path}")
+
+    def merge(self, path):
+        """
+            Перенос запусков из другой базы результатов.
+            Запуск, уже записанный с той же игрой, дивизионом и датой, пропускается.
+            Возвращает число перенесённых запусков.
+        """
+
+        self.conn.execute("ATTACH DATABASE ? AS dump", (path, ))
+
+        try:
+            version = self.conn.execute("PRAGMA dump.user_version").fetchone()[0]
+            if version > Store.schema_version:
+                raise RuntimeError(
+                    f"{path} HAS SCHEMA VERSION {version}, "
+                    f"SUPPORTED UP TO {Store.schema_version}")
+
+            tables = {name for name, in self.conn.execute(
+                "SELECT name FROM dump.sqlite_master WHERE type = 'table'")}
+            if "runs" not in tables:
+                return 0
+
+            runs = self.conn.execute(
+                "SELECT id, game, division, created_at FROM dump.runs "
+                "WHERE NOT EXISTS (SELECT 1 FROM main.runs WHERE main.runs.game = dump.runs.game "
+                "AND main.runs.division = dump.runs.division "
+                "AND main.runs.created_at = dump.runs.created_at) "
+                "ORDER BY created_at, id"
+            ).fetchall()
+
+            with self.conn:
+                for dump_id, game, division, created_at in runs:
+                    run_id = self.conn.execute(
+                        "INSERT INTO main.runs (game, division, created_at) VALUES (?, ?, ?)",
+                        (game, division, created_at)
+                    ).lastrowid
+                    self.conn.execute(
+                        "INSERT INTO main.standings SELECT ?, position, player, gitlab_id, "
+                        "score, record FROM dump.standings WHERE run_id = ?",
+                        (run_id, dump_id)
+                    )
+                    if "counters" in tables:
+                        self.conn.execute(
+                            "INSERT INTO main.counters SELECT ?, position, event, value "
+                            "FROM dump.counters WHERE run_id = ?",
+                            (run_id, dump_id)
+                        )
+                    if "dropped" in tables:
+                        self.conn.execute(
+                            "INSERT INTO main.dropped SELECT ?, player, position "
+                            "FROM dump.dropped WHERE run_id = ?",
+                            (run_id, dump_id)
+                        )
+        finally:
+            self.conn.execute("DETACH DATABASE dump")
+
+        return len(runs)
@@ -4,16 +4,17 @@
 
 
 import os
-import pickle
-import operator
+import hashlib
 from datetime import datetime
 from copy import deepcopy
-from functools import cmp_to_key
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
-from jinja2 import Template
-import intervals
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
 import gitlab
+import worker.store
+import worker.ranking
 
 @dataclass
 class Wiki:
@@ -29,9 +30,6 @@ class Wiki:
     single_time_col = 4
     single_sort_keys = (single_res_col, )
 
-    gt = 1
-    lt = -1
-
     no_result = -1337
     msg = "Отсутствует стратегия"
     output_params = (no_result, msg)
@@ -39,6 +37,12 @@ class Wiki:
     pos_change = ("🔺", "🔻")
     sign = ("✅", "❌")
 
+    templates_dir = "templates"
+    bytecode_cache_dir = ".cache/jinja2"
+
+    date_prefix = "**Обновлено:**"
+    publish_workers = 4
+
 
 def create_page(project, title, content):
     """
@@ -53,19 +57,56 @@ def create_page(project, title, content):
     )
 
 
+def content_hash(content):
+    """
+        Хэш содержимого страницы без строки с датой обновления.
+    """
+
+    sha = hashlib.sha256()
+
+    for line in content.splitlines():
+        line = line.rstrip()
+        if not line.startswith(Wiki.date_prefix):
+            sha.update(line.encode("utf-8"))
+            sha.update(b"\n")
+
+    return sha.hexdigest()
+
+
 def update_page(project, page_slug, title, content):
     """
         Обновление Wiki-страницы.
+        Страница не перезаписывается, если изменилась только дата обновления.
+        Возвращает True, если страница была записана.
     """
 
     try:
         page = project.wikis.get(page_slug)
+        if page.title == title and content_hash(page.content) == content_hash(content):
+            return False
         page.title = title
         page.content = content
         page.save()
     except (gitlab.exceptions.GitlabHttpError, gitlab.exceptions.GitlabGetError):
         create_page(project, title, content)
 
+    return True
+
+
+def publish_pages(project, pages):
+    """
+        Параллельная публикация страниц (slug, заголовок, содержимое),
+        не более Wiki.publish_workers запросов одновременно.
+    """
+
+    with ThreadPoolExecutor(max_workers=Wiki.publish_workers) as executor:
+        updated = list(executor.map(lambda page: update_page(project, *page), pages))
+
+    for (page_slug, _, _), is_updated in zip(pages, updated):
+        print(f"WIKI PAGE {page_slug} {'UPDATED' if is_updated else 'UNCHANGED, SKIPPED'}")
+
+    return updated
+
 
 def delete_page(project, page_slug):
     """
@@ -76,49 +117,47 @@ def delete_page(project, page_slug):
     page.delete()
 
 
-def get_date():
+@lru_cache(maxsize=None)
+def template_env():
     """
-        Получение текущей даты.
+        Общее окружение шаблонов: каждый шаблон компилируется один раз
+        за процесс, байткод сохраняется между запусками.
     """
 
-    now = datetime.now()
-    date = now.strftime("%H:%M:%S %d.%m.%Y")
+    os.makedirs(Wiki.bytecode_cache_dir, exist_ok=True)
 
-    return date
+    return Environment(
+        loader=FileSystemLoader(os.path.abspath(Wiki.templates_dir)),
+        bytecode_cache=FileSystemBytecodeCache(os.path.abspath(Wiki.bytecode_cache_dir)),
+        auto_reload=False
+    )
 
 
-def dispcmp(frec, srec):
+def generate_page(template_name, **context):
     """
-        Компаратор, учитывающий временное отклонение выполнения.
+        Потоковая генерация страницы по частям.
     """
 
-    if frec[Wiki.double_res_col] < srec[Wiki.double_res_col]:
-        return Wiki.gt
-    if frec[Wiki.double_res_col] > srec[Wiki.double_res_col]:
-        return Wiki.lt
-    if frec[Wiki.double_res_col].overlaps(srec[Wiki.double_res_col]):
-        if frec[Wiki.double_time_col] < srec[Wiki.double_time_col]:
-            return Wiki.gt
-        return Wiki.lt
+    return template_env().get_template(template_name).generate(**context)
+
+
+def render_page(template_name, **context):
+    """
+        Генерация страницы целиком.
+    """
 
-    return Wiki.gt
+    return "".join(generate_page(template_name, **context))
 
 
-def equalcmp(frec, srec):
+def get_date():
     """
-        Компаратор, учитывающий равенство полученных очков.
+        Получение текущей даты.
     """
 
-    if frec[Wiki.single_res_col] < srec[Wiki.single_res_col]:
-        return Wiki.gt
-    if frec[Wiki.single_res_col] > srec[Wiki.single_res_col]:
-        return Wiki.lt
-    if frec[Wiki.single_res_col] == srec[Wiki.single_res_col]:
-        if frec[Wiki.single_time_col] < srec[Wiki.single_time_col]:
-            return Wiki.gt
-        return Wiki.lt
+    now = datetime.now()
+    date = now.strftime("%H:%M:%S %d.%m.%Y")
 
-    return Wiki.gt
+    return date
 
 
 def params_sort(results, sort_keys, output_params, game):
@@ -131,17 +170,18 @@ def params_sort(results, sort_keys, output_params, game):
                          "W00DCUTT3Rgame")
 
     if game in timedep_games:
-        results = sorted(results, key=cmp_to_key(dispcmp), reverse=True)
-        results = sorted(results, key=operator.itemgetter(sort_keys[0]))
+        results = worker.ranking.timedep_sort(
+            results, sort_keys[0], sort_keys[1], Wiki.double_time_col)
 
         for rec in results:
-            if rec[sort_keys[1]] == intervals.closed(1337, intervals.inf):
+            if rec[sort_keys[1]].no_result:
                 rec[sort_keys[1]] = output_params[1]
             rec[Wiki.double_time_col] = rec[Wiki.double_time_col].strftime(
                 "%H:%M:%S %d.%m.%Y")
 
     if game in timedepless_games:
-        results = sorted(results, key=cmp_to_key(equalcmp))
+        results = worker.ranking.timedepless_sort(
+            results, sort_keys[0], Wiki.single_time_col)
 
         for rec in results:
             if rec[sort_keys[0]] == output_params[0]:
@@ -157,34 +197,32 @@ def params_sort(results, sort_keys, output_params, game):
 
 def form_table(results, sort_keys, output_params, game, compet):
     """
-        Формирование таблицы.
+        Формирование таблицы со сдвигами мест относительно прошлого запуска.
+        Выбывшие из таблицы игроки записываются в results.sqlite вместе с запуском.
     """
 
     results_new = deepcopy(results)
     results_new = params_sort(results_new, sort_keys, output_params, game)
 
-    results_old = []
-
-    if os.path.exists(f"tbdump_{game.lower()}{compet}.obj"):
-        with open(f"tbdump_{game.lower()}{compet}.obj", "rb") as results_dump:
-            results_old = pickle.load(results_dump)
-
     prize = {1: "🥇", 2: "🥈", 3: "🥉"}
 
-    for ind_new, new_rec in enumerate(results_new):
-        place = prize.setdefault(ind_new + 1, str(ind_new + 1))
+    with worker.store.ResultsStore() as results_store:
+        shifts, dropped = worker.ranking.rank_diff(
+            results_store.previous_players(game, compet),
+            [rec[1] for rec in results_new]
+        )
+
+        for ind_new, (new_rec, shift) in enumerate(zip(results_new, shifts)):
+            place = prize.setdefault(ind_new + 1, str(ind_new + 1))
 
-        for ind_old, old_rec in enumerate(results_old):
-            if new_rec[1] == old_rec[1]:
-                if ind_new > ind_old:
-                    place += f"{Wiki.pos_change[1]}-{ind_new - ind_old}"
-                elif ind_new < ind_old:
-                    place += f"{Wiki.pos_change[0]}+{ind_old - ind_new}"
+            if shift is not None and shift < 0:
+                place += f"{Wiki.pos_change[1]}-{-shift}"
+            elif shift is not None and shift > 0:
+                place += f"{Wiki.pos_change[0]}+{shift}"
 
-        new_rec[0] = place
+            new_rec[0] = place
 
-    with open(f"tbdump_{game.lower()}{compet}.obj", "wb") as results_dump:
-        pickle.dump(results_new, results_dump)
+        results_store.save_run(game, compet, results_new, dropped=dropped)
 
     return results_new
 
@@ -197,10 +235,7 @@ def handle_num63rsgame(fresults):
     results = form_table(fresults, Wiki.double_sort_keys, Wiki.output_params,
                          "NUM63RSgame", "")
 
-    with open(os.path.abspath("templates/num63rsgame.template")) as template:
-        tmp = template.read()
-
-    page = Template(tmp).render(results=results, date=get_date())
+    page = render_page("num63rsgame.template", results=results, date=get_date())
 
     return page
 
@@ -213,10 +248,7 @@ def handle_7equeencegame(fresults):
     results = form_table(fresults, Wiki.double_sort_keys, Wiki.output_params,
                          "7EQUEENCEgame", "")
 
-    with open(os.path.abspath("templates/7equeencegame.template")) as template:
-        tmp = template.read()
-
-    page = Template(tmp).render(results=results, date=get_date())
+    page = render_page("7equeencegame.template", results=results, date=get_date())
 
     return page
 
@@ -231,11 +263,8 @@ def handle_xogame(fresults, sresults):
     results_5x5 = form_table(sresults, Wiki.single_sort_keys, Wiki.output_params,
                              "XOgame", "_5x5")
 
-    with open(os.path.abspath("templates/xogame.template")) as template:
-        tmp = template.read()
-
-    page = Template(tmp).render(results_3x3=results_3x3,
-                                results_5x5=results_5x5, date=get_date())
+    page = render_page("xogame.template", results_3x3=results_3x3,
+                       results_5x5=results_5x5, date=get_date())
 
     return page
 
@@ -250,11 +279,8 @@ def handle_strgame(fresults, sresults):
     results_strtok = form_table(sresults, Wiki.double_sort_keys, Wiki.output_params,
                                 "STRgame", "_strtok")
 
-    with open(os.path.abspath("templates/strgame.template")) as template:
-        tmp = template.read()
-
-    page = Template(tmp).render(results_split=results_split,
-                                results_strtok=results_strtok, date=get_date())
+    page = render_page("strgame.template", results_split=results_split,
+                       results_strtok=results_strtok, date=get_date())
 
     return page
 
@@ -269,11 +295,8 @@ def handle_teen48game(fresults, sresults):
     results_6x6 = form_table(sresults, Wiki.single_sort_keys, Wiki.output_params,
                              "TEEN48game", "_6x6")
 
-    with open(os.path.abspath("templates/teen48game.template")) as template:
-        tmp = template.read()
-
-    page = Template(tmp).render(results_4x4=results_4x4,
-                                results_6x6=results_6x6, date=get_date())
+    page = render_page("teen48game.template", results_4x4=results_4x4,
+                       results_6x6=results_6x6, date=get_date())
 
     return page
 
@@ -286,10 +309,7 @@ def handle_tr4v31game(fresults):
     results = form_table(fresults, Wiki.double_sort_keys, Wiki.output_params,
                          "TR4V31game", "")
 
-    with open(os.path.abspath("templates/tr4v31game.template")) as template:
-        tmp = template.read()
-
-    page = Template(tmp).render(results=results, date=get_date())
+    page = render_page("tr4v31game.template", results=results, date=get_date())
 
     return page
 
@@ -302,10 +322,7 @@ def handle_t3tr15game(fresults):
     results = form_table(fresults, Wiki.single_sort_keys, Wiki.output_params,
                          "T3TR15game", "")
 
-    with open(os.path.abspath("templates/t3tr15game.template")) as template:
-        tmp = template.read()
-
-    page = Template(tmp).render(results=results, date=get_date())
+    page = render_page("t3tr15game.template", results=results, date=get_date())
 
     return page
 
@@ -320,11 +337,8 @@ def handle_r3463ntgame(fresults, sresults):
     results_20x20 = form_table(sresults, Wiki.single_sort_keys, Wiki.output_params,
                              "R3463NTgame", "_20x20")
 
-    with open(os.path.abspath("templates/r3463ntgame.template")) as template:
-        tmp = template.read()
-
-    page = Template(tmp).render(results_10x10=results_10x10,
-                                results_20x20=results_20x20, date=get_date())
+    page = render_page("r3463ntgame.template", results_10x10=results_10x10,
+                       results_20x20=results_20x20, date=get_date())
 
     return page
 
@@ -337,17 +351,15 @@ def handle_w00dcutt3rgame(fresults):
     results = form_table(fresults, Wiki.single_sort_keys, Wiki.output_params,
                              "W00DCUTT3Rgame", "")
 
-    with open(os.path.abspath("templates/w00dcutt3rgame.template")) as template:
-        tmp = template.read()
-
-    page = Template(tmp).render(results=results, date=get_date())
+    page = render_page("w00dcutt3rgame.template", results=results, date=get_date())
 
     return page
 
 
-def update_wiki(project, game, fresults, sresults):
+def render_pages(game, fresults, sresults):
     """
-        Обновление Wiki-страницы с обновленными результатами.
+        Формирование Wiki-страниц игры с обновленными результатами:
+        список (slug, заголовок, содержимое).
     """
 
     games = {
@@ -392,6 +404,12 @@ def update_wiki(project, game, fresults, sresults):
     elif game.startswith("W00DCUTT3Rgame"):
         page = handle_w00dcutt3rgame(fresults)
 
-    for key in games:
-        if game in key:
-            update_page(project, games.get(key), key, page)
+    return [(games.get(key), key, page) for key in games if game in key]
+
+
+def update_wiki(project, game, fresults, sresults):
+    """
+        Обновление Wiki-страницы с обновленными результатами.
+    """
+
+    publish_pages(project, render_pages(game, fresults, sresults))